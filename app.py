@@ -1,8 +1,47 @@
-from flask import Flask, render_template, request
+from flask import Flask, Response, render_template, request
+from jinja2 import FileSystemBytecodeCache
 from src.api.routes import api_bp
 from src.utils.config import get_config
+from src.utils.json_provider import ORJSONProvider
+import gzip
+import hashlib
+import pandas as pd
 import logging
 
+# Static pages rendered once at startup as (plain, gzip, content hash) entries
+_PRECOMPILED = {}
+
+def precompile_pages(app):
+    """Render the static templates once and keep plain and gzip-compressed bodies with their hash."""
+    with app.test_request_context():
+        for name in ('index', '404', '500'):
+            body = render_template(f'{name}.html').encode('utf-8')
+            _PRECOMPILED[name] = (body, gzip.compress(body), hashlib.md5(body).hexdigest())
+
+def page_response(name, status=200, cache_control=None):
+    """Serve a precompiled page, gzip-encoded when the client accepts it."""
+    if name not in _PRECOMPILED:
+        return render_template(f'{name}.html'), status
+    
+    body, compressed, content_hash = _PRECOMPILED[name]
+    if 'gzip' in request.accept_encodings:
+        response = Response(compressed, status=status, mimetype='text/html')
+        response.headers['Content-Encoding'] = 'gzip'
+        etag = f"{content_hash}-gzip"  # Each encoding is a different representation
+    else:
+        response = Response(body, status=status, mimetype='text/html')
+        etag = content_hash
+    
+    response.headers['Vary'] = 'Accept-Encoding'
+    if cache_control:
+        response.headers['Cache-Control'] = cache_control
+    
+    # Successful pages can be revalidated once their max-age runs out
+    if status != 200:
+        return response
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
 def create_app():
     """Application factory pattern for creating Flask app."""
     try:
@@ -13,9 +52,21 @@ def create_app():
         if not config.validate():
             raise ValueError("Invalid configuration. Check logs for details.")
         
+        # Frames are shared between the fetcher, the strategy and the simulator state without
+        # defensive copies; copy-on-write keeps a change by one of them from reaching the others
+        pd.set_option("mode.copy_on_write", True)
+        
         app = Flask(__name__, 
                     template_folder='static/templates',
                     static_folder='static')
+        app.json = ORJSONProvider(app)
+        
+        # Keep every compiled template in memory and persist bytecode across restarts
+        app.jinja_options = {
+            **app.jinja_options,
+            'cache_size': -1,
+            'bytecode_cache': FileSystemBytecodeCache()
+        }
         
         # Configure app with validated settings
         flask_config = config.get_flask_config()
@@ -23,6 +74,10 @@ def create_app():
         
         # Register blueprints
         app.register_blueprint(api_bp)
+        
+        # Pre-render static pages; debug mode renders live so template edits show up
+        if not app.debug:
+            precompile_pages(app)
     except Exception as e:
         logging.error(f"Failed to create Flask app: {e}")
         raise
@@ -31,28 +86,28 @@ def create_app():
     def index():
         """Main dashboard route."""
         try:
-            return render_template('index.html')
+            return page_response('index', cache_control='public, max-age=300')
         except Exception as e:
             logging.error(f"Error rendering index template: {e}")
-            return render_template('500.html'), 500
+            return page_response('500', 500)
     
     @app.errorhandler(404)
     def not_found(error):
         """Handle 404 errors."""
         logging.warning(f"404 error: {request.url}")
-        return render_template('404.html'), 404
+        return page_response('404', 404)
     
     @app.errorhandler(500)
     def internal_error(error):
         """Handle 500 errors."""
         logging.error(f"500 error: {error}")
-        return render_template('500.html'), 500
+        return page_response('500', 500)
     
     @app.errorhandler(Exception)
     def handle_exception(e):
         """Handle unhandled exceptions."""
         logging.error(f"Unhandled exception: {e}")
-        return render_template('500.html'), 500
+        return page_response('500', 500)
     
     return app
 
@@ -40,6 +40,10 @@ setup(
             "flake8>=3.8",
             "mypy>=0.800",
         ],
+        "fast": [
+            "numba>=0.59",
+            "bottleneck>=1.3.6",
+        ],
     },
     entry_points={
         "console_scripts": [
@@ -1,150 +1,225 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, g, jsonify, make_response, request
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
 import threading
+from functools import wraps
 import time
+import uuid
+import weakref
 import numpy as np
+import logging
+from typing import Optional
 
 # Import from core modules
 from ..core.data_fetcher import DataFetcher
 from ..core.strategy import TradingStrategy
-from ..models.state import get_simulator_state
+from ..core.strategy_kernels import replay_trades
+from ..models.state import MAX_PORTFOLIO_VALUES, TRADE_TYPE_NAMES, SimulatorState, create_session, delete_session, get_session, get_simulator_state
+from ..utils.config import get_config
+
+logger = logging.getLogger(__name__)
 
 # Create Blueprint for API routes
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
-# Get the global state instance
+# Get the global state instance, used by requests that name no session
 simulator_state = get_simulator_state()
-data_fetcher = None  # Global data fetcher instance
+bootstrap_fetcher = None  # Shared fetcher for chart data before the simulator starts
+ETAG_PREFIX = uuid.uuid4().hex[:8]  # Distinguishes this process's state versions from a previous run's
+CHART_DTYPE = np.float32  # Chart price lines only need display precision, and serialize shorter as float32
+
+# Conservative strategy parameters for better profitability; fixed windows reuse one compiled kernel
+SIMULATOR_STRATEGY_PARAMS = {
+    'short_window': 5,
+    'long_window': 20,
+    'profit_threshold': 0.015,
+    'stop_loss': 0.01
+}
+
+def get_bootstrap_fetcher() -> DataFetcher:
+    """Get the fetcher used to seed the charts, reusing its response cache across polls."""
+    global bootstrap_fetcher
+    if bootstrap_fetcher is None:
+        # A single attempt keeps the request thread from sleeping through retry backoff
+        bootstrap_fetcher = DataFetcher(symbol="AAPL", interval="1m", period="1d", max_retries=1)
+    return bootstrap_fetcher
+
+def request_session_id() -> Optional[str]:
+    """Get the simulator session a request targets, from the query string or the JSON body."""
+    session_id = request.args.get('session_id')
+    if session_id is None and request.is_json:
+        body = request.get_json(silent=True)
+        if isinstance(body, dict):
+            session_id = body.get('session_id')
+    return session_id
+
+@api_bp.before_request
+def load_session_state():
+    """Resolve the simulator session of the request, rejecting unknown session ids."""
+    g.session_id = request_session_id()
+    g.simulator_state = get_session(g.session_id)
+    if g.simulator_state is None:
+        return jsonify({
+            "error": f"Unknown session: {g.session_id}"
+        }), 404
 
-def run_simulator_background(symbol="AAPL", interval="1m", period="1d", initial_cash=5000, selected_date=None):
+def cached_by_state_version(view):
+    """Serve a view's last JSON body again while the simulator state version is unchanged.
+    
+    Cached responses carry the version as their ETag, so a client that already
+    holds it gets a 304 without a body.
+    """
+    # Keyed by the state itself, so a removed session's entry goes away with it
+    cached = weakref.WeakKeyDictionary()  # simulator state -> (state version, response body)
+    
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        version = g.simulator_state.version
+        cached_version, body = cached.get(g.simulator_state, (None, None))
+        if cached_version == version:
+            response = current_app.response_class(body, mimetype='application/json')
+        else:
+            response = make_response(view(*args, **kwargs))
+            
+            # Only successful payloads are reused; errors, and fallbacks marked no-store, are rebuilt on the next poll
+            if response.status_code != 200 or response.cache_control.no_store:
+                return response
+            cached[g.simulator_state] = (version, response.get_data())
+        
+        # Versions restart with the process, so the tag also names this process
+        response.set_etag(f"{ETAG_PREFIX}-{version}")
+        return response.make_conditional(request)
+    
+    return wrapper
+
+def run_simulator_background(symbol="AAPL", interval="1m", period="1d", initial_cash=5000, selected_date=None,
+                             state: Optional[SimulatorState] = None):
     """Run the simulator in a background thread with enhanced data handling."""
-    global data_fetcher
+    # Each session runs against its own state; the global one by default
+    state = state or simulator_state
+    
+    # This run's stop signal; a later run gets its own, so a stopped run never resumes
+    stop_event = state.stop_event
     
-    # Use more conservative strategy parameters for better profitability
-    strategy = TradingStrategy(short_window=5, long_window=20, profit_threshold=0.015, stop_loss=0.01)
+    strategy = TradingStrategy(**SIMULATOR_STRATEGY_PARAMS)
     
     # Initialize portfolio tracking and clear previous trades
-    simulator_state.clear_portfolio_values()
-    simulator_state.clear_trades()
+    state.clear_portfolio_values()
+    state.clear_trades()
     current_cash = initial_cash
     shares_held = 0
-    simulator_state.add_portfolio_value(initial_cash)
     
     # Store initial cash for baseline calculations
-    simulator_state.global_initial_cash = initial_cash
+    state.global_initial_cash = initial_cash
     
     iteration = 0
     consecutive_failures = 0
     max_failures = 3
+    poll_interval = 5  # Seconds between real-time polls while bars keep arriving
+    # Back off when the market goes quiet: (seconds without a new bar, seconds between polls)
+    idle_poll_intervals = ((300, 60), (60, 15))
     
     # Initialize data fetcher
-    data_fetcher = DataFetcher(symbol=symbol, interval=interval, period=period, start_date=selected_date)
+    data_fetcher = DataFetcher(symbol=symbol, interval=interval, period=period, start_date=selected_date,
+                               cache_dir=get_config().trading.data_cache_dir)
     
     # Always run historical simulation first to populate data
-    print(f"Running historical simulation for {symbol}")
+    logger.info(f"Running historical simulation for {symbol}")
     
-    # Fetch all historical data
-    all_historical_data = data_fetcher.get_real_time_data()
+    # Fetch all historical data; later polls only hand out bars newer than these
+    all_historical_data = data_fetcher.get_new_bars()
     
     if all_historical_data.empty:
-        print(f"No historical data available")
+        logger.warning("No historical data available")
         return
     
-    print(f"Fetched {len(all_historical_data)} data points for historical simulation")
+    logger.info(f"Fetched {len(all_historical_data)} data points for historical simulation")
+    
+    # Portfolio values are stamped with the time of the bar that produced them
+    state.add_portfolio_value(initial_cash, all_historical_data.index[0].isoformat())
     
     # Generate signals for all historical data
     signals_result = strategy.generate_signals(all_historical_data)
     if signals_result.success and not signals_result.signals.empty:
-        simulator_state.current_data = all_historical_data
-        simulator_state.current_signals = signals_result.signals
+        logger.info("Processing historical data for trading simulation...")
         
-        # Process historical data incrementally to simulate trading
-        print("Processing historical data for trading simulation...")
+        # Replay every bar in one compiled pass over the price and signal columns
+        signals = signals_result.signals
+        price_values = signals['price'].to_numpy(dtype=np.float64)
+        portfolio_values, trade_indices, trade_types, trade_quantities, current_cash, shares_held = replay_trades(
+            price_values,
+            signals['signal'].to_numpy(dtype=np.int64),
+            float(initial_cash),
+            0.02
+        )
         
-        for i, (timestamp, row) in enumerate(signals_result.signals.iterrows()):
-            if not simulator_state.is_simulator_running:
-                break
-                
-            signal = row['signal']
-            price = row['price']
-            
-            if signal == 1 and current_cash >= price:  # Buy signal
-                shares_to_buy = strategy.get_position_size(current_cash, price, risk_per_trade=0.02)
-                if shares_to_buy > 0:
-                    cost = shares_to_buy * price
-                    current_cash -= cost
-                    shares_held += shares_to_buy
-                    
-                    trade = {
-                        "time": timestamp.isoformat(),
-                        "symbol": symbol,
-                        "type": "buy",
-                        "price": price,
-                        "quantity": shares_to_buy
-                    }
-                    simulator_state.add_trade(trade)
-                    print(f"Historical BUY: {shares_to_buy} shares at ${price:.2f}")
-                    
-            elif signal == -1 and shares_held > 0:  # Sell signal
-                proceeds = shares_held * price
-                current_cash += proceeds
-                
-                trade = {
-                    "time": timestamp.isoformat(),
-                    "symbol": symbol,
-                    "type": "sell",
-                    "price": price,
-                    "quantity": shares_held
-                }
-                simulator_state.add_trade(trade)
-                print(f"Historical SELL: {shares_held} shares at ${price:.2f}")
-                shares_held = 0
-            
-            # Calculate current portfolio value
-            current_portfolio_value = current_cash + (shares_held * price)
-            simulator_state.add_portfolio_value(current_portfolio_value)
-            
-            # Show progress every 200 iterations
-            if i % 200 == 0:
-                profit_loss = current_portfolio_value - simulator_state.global_initial_cash
-                profit_percentage = (profit_loss / simulator_state.global_initial_cash) * 100
-                print(f"Historical progress {i}/{len(signals_result.signals)}: Portfolio ${current_portfolio_value:.2f} (P&L: ${profit_loss:.2f}, {profit_percentage:.2f}%)")
+        # Build trade records only for the bars that traded
+        historical_trades = []
+        for i, trade_type, quantity in zip(trade_indices.tolist(), trade_types.tolist(), trade_quantities.tolist()):
+            price = float(price_values[i])
+            historical_trades.append({
+                "time": signals.index[i].isoformat(),
+                "symbol": symbol,
+                "type": TRADE_TYPE_NAMES[trade_type],
+                "price": price,
+                "quantity": quantity
+            })
+            logger.info(f"Historical {TRADE_TYPE_NAMES[trade_type].upper()}: {quantity} shares at ${price:.2f}")
         
-        print(f"Historical simulation completed. Generated {len(simulator_state.trades_list)} trades.")
+        # Only the newest values fit in the bounded history, so only their bars need a timestamp string
+        kept = slice(max(0, len(signals) - MAX_PORTFOLIO_VALUES), None)
+        bar_times = [timestamp.isoformat() for timestamp in signals.index[kept]]
+        
+        # Readers see the bars together with every trade and portfolio value they produced
+        state.publish_results(all_historical_data, signals, historical_trades, portfolio_values[kept].tolist(), bar_times)
+        
+        logger.info(f"Historical simulation completed. Generated {state.trade_count} trades.")
         
         # Calculate final results
-        final_value = simulator_state.portfolio_values[-1] if simulator_state.portfolio_values else initial_cash
+        final_value = state.portfolio_values[-1] if state.portfolio_values else initial_cash
         total_return = final_value - initial_cash
         total_return_percentage = (total_return / initial_cash) * 100
-        print(f"Final portfolio value: ${final_value:.2f} (Return: ${total_return:.2f}, {total_return_percentage:.2f}%)")
+        logger.info(f"Final portfolio value: ${final_value:.2f} (Return: ${total_return:.2f}, {total_return_percentage:.2f}%)")
     
     # Now continue with real-time simulation if still running
-    if not simulator_state.is_simulator_running:
-        print("Simulator stopped after historical simulation.")
+    if stop_event.is_set():
+        logger.info("Simulator stopped after historical simulation.")
         return
     
-    print(f"Starting real-time simulator for {symbol}")
+    logger.info(f"Starting real-time simulator for {symbol}")
+    
+    # Seed the running indicators so each live bar is scored in O(1) instead of re-running the window
+    strategy.prime_indicators(all_historical_data["Close"])
     
-    while simulator_state.is_simulator_running:
+    last_bar_time = time.monotonic()
+    
+    while not stop_event.is_set():
+        tick_start = time.monotonic()
         try:
             # Fetch real-time data
-            data = data_fetcher.get_real_time_data()
+            new_bars = data_fetcher.get_new_bars()
+            data = data_fetcher.last_data
             
             if not data.empty:
-                simulator_state.current_data = data
                 consecutive_failures = 0  # Reset failure counter
                 
-                # Generate signals
-                signals_result = strategy.generate_signals(data)
-                if signals_result.success and not signals_result.signals.empty:
-                    simulator_state.current_signals = signals_result.signals
-                    
-                    # Get latest price
-                    latest_price = signals_result.signals["price"].iloc[-1]
+                # Signals only change when a new bar arrives; score just the new bars
+                if new_bars.empty:
+                    # Republish only a revised frame, such as an updated last bar; an unchanged one
+                    # would bump the state version and void every client's ETag
+                    if not data.equals(state.current_data):
+                        state.current_data = data
+                else:
+                    last_bar_time = tick_start
+                    new_rows = [strategy.push_price(price) for price in new_bars["Close"].to_numpy()]
+                    new_signals = pd.DataFrame(new_rows, index=new_bars.index)
+                    _, signals = state.get_market_data()
+                    signals = pd.concat([signals, new_signals]).tail(len(data)) if not signals.empty else new_signals
+                    new_trades = []
                     
-                    # Check if we have a signal
-                    latest_signal = int(signals_result.signals["signal"].iloc[-1])
+                    # Get latest price and signal straight from the newest scored row
+                    latest_price = new_rows[-1]["price"]
+                    latest_signal = int(new_rows[-1]["signal"])
                     
                     if latest_signal != 0:
                         if latest_signal == 1 and current_cash >= latest_price:  # Buy signal
@@ -162,8 +237,8 @@ def run_simulator_background(symbol="AAPL", interval="1m", period="1d", initial_
                                     "price": latest_price,
                                     "quantity": shares_to_buy
                                 }
-                                simulator_state.add_trade(trade)  # Store in memory instead of database
-                                print(f"Real-time BUY: {shares_to_buy} shares at ${latest_price:.2f}")
+                                new_trades.append(trade)
+                                logger.info(f"Real-time BUY: {shares_to_buy} shares at ${latest_price:.2f}")
                                 
                         elif latest_signal == -1 and shares_held > 0:  # Sell signal
                             proceeds = shares_held * latest_price
@@ -176,130 +251,127 @@ def run_simulator_background(symbol="AAPL", interval="1m", period="1d", initial_
                                 "price": latest_price,
                                 "quantity": shares_held
                             }
-                            simulator_state.add_trade(trade)  # Store in memory instead of database
-                            print(f"Real-time SELL: {shares_held} shares at ${latest_price:.2f}")
+                            new_trades.append(trade)
+                            logger.info(f"Real-time SELL: {shares_held} shares at ${latest_price:.2f}")
                             shares_held = 0
                     
                     # Calculate current portfolio value with better tracking
                     current_portfolio_value = current_cash + (shares_held * latest_price)
-                    simulator_state.add_portfolio_value(current_portfolio_value)
+                    
+                    # Publish the bar, its trade and the resulting portfolio value as one change
+                    state.publish_results(data, signals, new_trades, [current_portfolio_value],
+                                          [new_signals.index[-1].isoformat()])
                     
                     # Calculate and log profit/loss
-                    profit_loss = current_portfolio_value - simulator_state.global_initial_cash
-                    profit_percentage = (profit_loss / simulator_state.global_initial_cash) * 100
-                    print(f"Iteration {iteration}: Portfolio: ${current_portfolio_value:.2f} | P&L: ${profit_loss:.2f} ({profit_percentage:.2f}%)")
+                    profit_loss = current_portfolio_value - state.global_initial_cash
+                    profit_percentage = (profit_loss / state.global_initial_cash) * 100
+                    logger.info(f"Iteration {iteration}: Portfolio: ${current_portfolio_value:.2f} | P&L: ${profit_loss:.2f} ({profit_percentage:.2f}%)")
                     
                     iteration += 1
                     
             else:
                 consecutive_failures += 1
-                print(f"No data received. Failure {consecutive_failures}/{max_failures}")
+                logger.warning(f"No data received. Failure {consecutive_failures}/{max_failures}")
                 
                 if consecutive_failures >= max_failures:
-                    print("Too many consecutive failures. Stopping simulation.")
+                    logger.error("Too many consecutive failures. Stopping simulation.")
                     break
                     
         except Exception as e:
             consecutive_failures += 1
-            print(f"Error in simulation: {e}")
+            logger.error(f"Error in simulation: {e}")
             
             if consecutive_failures >= max_failures:
-                print("Too many consecutive failures. Stopping simulation.")
+                logger.error("Too many consecutive failures. Stopping simulation.")
                 break
                 
-        time.sleep(5)  # Reduced wait time for more frequent updates
+        # Poll less often the longer no new bar has arrived; any new bar restores the base interval
+        idle_seconds = tick_start - last_bar_time
+        wait_seconds = next((wait for idle, wait in idle_poll_intervals if idle_seconds >= idle), poll_interval)
+        
+        # Wait only for what is left of the interval so fetch time doesn't stretch the cadence;
+        # stopping the simulator wakes the wait immediately
+        stop_event.wait(max(0.0, wait_seconds - (time.monotonic() - tick_start)))
     
-    print("Simulator stopped.")
+    logger.info("Simulator stopped.")
 
 @api_bp.route('/trades')
+@cached_by_state_version
 def get_trades():
     """Get all trades with enhanced formatting."""
-    return jsonify(simulator_state.trades_list)  # Return just the trades list, not wrapped in a dict
+    # Return just the trades list, not wrapped in a dict; each trade is serialized once and reused
+    return current_app.response_class(g.simulator_state.get_trades_json(), mimetype='application/json')
+
+def column_values(frame: pd.DataFrame, column: str, n: int, fill: float = np.nan) -> np.ndarray:
+    """First n values of a column as a float array, with NaN (or a missing column) replaced by fill."""
+    if column not in frame.columns:
+        return np.full(n, fill, dtype=np.float64)
+    
+    values = frame[column].to_numpy(dtype=np.float64)[:n]
+    return values if np.isnan(fill) else np.nan_to_num(values, nan=fill)
+
+def bootstrap_market_data(state: SimulatorState):
+    """Publish initial data and signals when the simulator has none yet; an error response if it can't."""
+    try:
+        # Fetch some initial data through the shared bootstrap fetcher
+        temp_data = get_bootstrap_fetcher().get_real_time_data()
+        
+        if not temp_data.empty:
+            # Generate some basic signals for the temp data
+            temp_strategy = TradingStrategy(short_window=5, long_window=20)
+            temp_signals_result = temp_strategy.generate_signals(temp_data)
+            
+            if temp_signals_result.success and not temp_signals_result.signals.empty:
+                state.set_market_data(temp_data, temp_signals_result.signals)
+                return None
+        
+        return jsonify({
+            "error": "No data available"
+        }), 404
+    except Exception as e:
+        return jsonify({
+            "error": f"Failed to fetch initial data: {str(e)}"
+        }), 500
 
 @api_bp.route('/stock-data')
 def get_stock_data():
-    """Get current stock data and signals for charting with enhanced formatting."""
+    """Get current stock data and signals for charting, fetching initial data if there is none yet."""
+    current_data, current_signals = g.simulator_state.get_market_data()
     
-    # If no data is available yet, try to fetch some initial data
-    if simulator_state.current_data.empty or simulator_state.current_signals.empty:
-        try:
-            # Create a temporary data fetcher to get some initial data
-            temp_fetcher = DataFetcher(symbol="AAPL", interval="1m", period="1d")
-            temp_data = temp_fetcher.get_real_time_data()
-            
-            if not temp_data.empty:
-                # Generate some basic signals for the temp data
-                temp_strategy = TradingStrategy(short_window=5, long_window=20)
-                temp_signals_result = temp_strategy.generate_signals(temp_data)
-                
-                if temp_signals_result.success and not temp_signals_result.signals.empty:
-                    simulator_state.current_data = temp_data
-                    simulator_state.current_signals = temp_signals_result.signals
-                else:
-                    return jsonify({
-                        "error": "No data available"
-                    }), 404
-            else:
-                return jsonify({
-                    "error": "No data available"
-                }), 404
-        except Exception as e:
-            return jsonify({
-                "error": f"Failed to fetch initial data: {str(e)}"
-            }), 500
+    # The bootstrap write bumps the state version, so it happens before the cached view reads it
+    if current_data.empty or current_signals.empty:
+        error = bootstrap_market_data(g.simulator_state)
+        if error is not None:
+            return error
     
-    # Format data for the frontend charts with enhanced structure
-    timestamps = []
-    prices = []
-    short_ma = []
-    long_ma = []
-    signals = []
-    volumes = []
+    return get_chart_data()
+
+@cached_by_state_version
+def get_chart_data():
+    """Format the current stock data and signals for the frontend charts."""
+    # Read data and signals once, as a consistent pair
+    current_data, current_signals = g.simulator_state.get_market_data()
     
+    # Format data for the frontend charts with enhanced structure
     try:
-        for i in range(len(simulator_state.current_signals)):
-            if i < len(simulator_state.current_data):
-                # Get timestamp
-                timestamp = simulator_state.current_data.index[i]
-                if hasattr(timestamp, 'isoformat'):
-                    timestamps.append(timestamp.isoformat())
-                else:
-                    timestamps.append(str(timestamp))
-                
-                # Get price - handle both column names
-                if 'Close' in simulator_state.current_data.columns:
-                    price_val = simulator_state.current_data.iloc[i]['Close']
-                elif 'price' in simulator_state.current_data.columns:
-                    price_val = simulator_state.current_data.iloc[i]['price']
-                else:
-                    price_val = 0
-                
-                prices.append(float(price_val) if pd.notna(price_val) else 0)
-                
-                # Get moving averages - handle missing values
-                short_ma_val = simulator_state.current_signals.iloc[i]['short_ma'] if 'short_ma' in simulator_state.current_signals.columns else None
-                long_ma_val = simulator_state.current_signals.iloc[i]['long_ma'] if 'long_ma' in simulator_state.current_signals.columns else None
-                
-                short_ma.append(float(short_ma_val) if pd.notna(short_ma_val) else None)
-                long_ma.append(float(long_ma_val) if pd.notna(long_ma_val) else None)
-                
-                # Get signal
-                signal_val = simulator_state.current_signals.iloc[i]['signal'] if 'signal' in simulator_state.current_signals.columns else 0
-                signals.append(int(signal_val) if pd.notna(signal_val) else 0)
-                
-                # Get volume
-                if 'Volume' in simulator_state.current_data.columns:
-                    volume_val = simulator_state.current_data.iloc[i]['Volume']
-                    volumes.append(float(volume_val) if pd.notna(volume_val) else 0)
-                else:
-                    volumes.append(0)
+        n = min(len(current_signals), len(current_data))
+        
+        timestamps = [ts.isoformat() if hasattr(ts, 'isoformat') else str(ts) for ts in current_data.index[:n]]
+        
+        prices = column_values(current_data, 'Close', n, fill=0)
+        
+        # Moving averages keep missing values as NaN, serialized as null so the chart shows gaps
+        short_ma = column_values(current_signals, 'short_ma', n).astype(CHART_DTYPE)
+        long_ma = column_values(current_signals, 'long_ma', n).astype(CHART_DTYPE)
+        signals = column_values(current_signals, 'signal', n, fill=0).astype(np.int64)
+        volumes = column_values(current_data, 'Volume', n, fill=0)
         
         # Add current price for immediate display
-        current_price = prices[-1] if prices else 0
+        current_price = float(prices[-1]) if len(prices) else 0
         
         return jsonify({
             "timestamps": timestamps,
-            "prices": prices,
+            "prices": prices.astype(CHART_DTYPE),
             "short_ma": short_ma,
             "long_ma": long_ma,
             "signals": signals,
@@ -312,78 +384,61 @@ def get_stock_data():
         # Return a more detailed error response
         return jsonify({
             "error": f"Error formatting stock data: {str(e)}",
-            "current_data_shape": simulator_state.current_data.shape if not simulator_state.current_data.empty else "empty",
-            "current_signals_shape": simulator_state.current_signals.shape if not simulator_state.current_signals.empty else "empty"
+            "current_data_shape": current_data.shape if not current_data.empty else "empty",
+            "current_signals_shape": current_signals.shape if not current_signals.empty else "empty"
         }), 500
 
 @api_bp.route('/portfolio-values')
+@cached_by_state_version
 def get_portfolio_values():
     """Get portfolio value history for charting with enhanced formatting."""
-    if not simulator_state.portfolio_values:
+    state = g.simulator_state
+    timestamps, values = state.get_portfolio_history()
+    if not values:
         return jsonify({
             "timestamps": [],
             "values": [],
             "prices": [],
-            "initial_cash": simulator_state.global_initial_cash,
-            "current_value": simulator_state.global_initial_cash
+            "initial_cash": state.global_initial_cash,
+            "current_value": state.global_initial_cash
         })
     
-    # Create timestamps for portfolio values
-    timestamps = []
-    values = []
-    prices = []
+    n = len(values)
     
-    # Get current stock price for baseline calculation
-    current_price = 0
-    if not simulator_state.current_data.empty:
-        if 'Close' in simulator_state.current_data.columns:
-            current_price = float(simulator_state.current_data.iloc[-1]['Close'])
-        else:
-            current_price = float(simulator_state.current_data.iloc[-1]['price'])
+    # Corresponding prices from current_data where available
+    current_data, _ = state.get_market_data()
+    data_prices = current_data['Close'].to_numpy(dtype=np.float64) if not current_data.empty else np.empty(0)
+    prices = data_prices[:n].tolist()
     
-    for i, value in enumerate(simulator_state.portfolio_values):
-        # Create a timestamp based on current time minus the index using timedelta
-        from datetime import timedelta
-        
-        # Calculate total seconds to subtract (more frequent updates)
-        total_seconds_to_subtract = (len(simulator_state.portfolio_values) - i - 1) * 5  # 5-second intervals
-        
-        # Use timedelta for safe time arithmetic
-        timestamp = datetime.now().replace(microsecond=0) - timedelta(seconds=total_seconds_to_subtract)
-        
-        timestamps.append(timestamp.isoformat())
-        values.append(float(value))
-        
-        # Get corresponding price from current_data if available
-        if not simulator_state.current_data.empty and i < len(simulator_state.current_data):
-            if 'Close' in simulator_state.current_data.columns:
-                price = float(simulator_state.current_data.iloc[i]['Close'])
-            else:
-                price = float(simulator_state.current_data.iloc[i]['price'])
-            prices.append(price)
-        else:
-            # Estimate price based on portfolio value
-            prices.append(current_price if current_price > 0 else float(value) / 100)
+    # Estimate the rest from the current stock price, or from the portfolio value
+    current_price = float(data_prices[-1]) if len(data_prices) else 0
+    prices.extend(current_price if current_price > 0 else value / 100 for value in values[len(prices):])
     
     return jsonify({
         "timestamps": timestamps,
         "values": values,
         "prices": prices,
-        "initial_cash": simulator_state.global_initial_cash,
-        "current_value": float(simulator_state.portfolio_values[-1]) if simulator_state.portfolio_values else simulator_state.global_initial_cash
+        "initial_cash": state.global_initial_cash,
+        "current_value": values[-1]
     })
 
 @api_bp.route('/start-simulator', methods=['POST'])
 def start_simulator():
-    """Start the trading simulator."""
+    """Start the trading simulator, in a new independent session if the body asks for one."""
+    data = request.get_json(silent=True) or {}
+    
+    # A new session runs alongside the others; otherwise the requested (or global) session is reused
+    if data.get('new_session'):
+        session_id, state = create_session()
+    else:
+        session_id, state = g.session_id, g.simulator_state
     
-    if simulator_state.is_simulator_running:
+    if state.is_simulator_running:
         return jsonify({
             "error": "Simulator is already running"
         }), 400
     
     try:
-        data = request.get_json()
         symbol = data.get('symbol', 'AAPL')
         interval = data.get('interval', '1m')
         period = data.get('period', '1d')
@@ -392,22 +447,25 @@ def start_simulator():
         
         # Validate parameters
         if initial_cash <= 0:
+            if data.get('new_session'):
+                delete_session(session_id)
             return jsonify({
                 "error": "Initial cash must be positive"
             }), 400
         
         # Start simulator in background thread
-        simulator_state.is_simulator_running = True
+        state.is_simulator_running = True
         simulator_thread = threading.Thread(
             target=run_simulator_background,
-            args=(symbol, interval, period, initial_cash, selected_date)
+            args=(symbol, interval, period, initial_cash, selected_date, state)
         )
         simulator_thread.daemon = True
-        simulator_state.simulator_thread = simulator_thread
+        state.simulator_thread = simulator_thread
         simulator_thread.start()
         
         return jsonify({
             "message": "Simulator started successfully",
+            "session_id": session_id,
             "symbol": symbol,
             "interval": interval,
             "period": period,
@@ -416,6 +474,8 @@ def start_simulator():
         })
         
     except Exception as e:
+        if data.get('new_session'):
+            delete_session(session_id)
         return jsonify({
             "error": f"Failed to start simulator: {str(e)}"
         }), 500
@@ -423,102 +483,90 @@ def start_simulator():
 @api_bp.route('/stop-simulator', methods=['POST'])
 def stop_simulator():
     """Stop the trading simulator."""
+    state = g.simulator_state
     
-    if not simulator_state.is_simulator_running:
+    if not state.is_simulator_running:
         return jsonify({
             "error": "Simulator is not running"
         }), 400
     
-    simulator_state.is_simulator_running = False
+    state.is_simulator_running = False
     return jsonify({
         "message": "Simulator stopped successfully"
     })
 
+@api_bp.route('/sessions/<session_id>', methods=['DELETE'])
+def remove_session(session_id):
+    """Stop a simulator session and release its state."""
+    if not delete_session(session_id):
+        return jsonify({
+            "error": f"Unknown session: {session_id}"
+        }), 404
+    
+    return jsonify({
+        "message": "Session removed successfully",
+        "session_id": session_id
+    })
+
 @api_bp.route('/simulator-status')
+@cached_by_state_version
 def get_simulator_status():
     """Get the current status of the simulator."""
+    state = g.simulator_state
+    # The accessor copies the history, so read it once
+    portfolio_values = state.portfolio_values
     return jsonify({
-        "is_running": simulator_state.is_simulator_running,
-        "total_trades": len(simulator_state.trades_list),
-        "current_portfolio_value": float(simulator_state.portfolio_values[-1]) if simulator_state.portfolio_values else simulator_state.global_initial_cash,
-        "total_portfolio_values": len(simulator_state.portfolio_values),
-        "initial_cash": simulator_state.global_initial_cash
+        "is_running": state.is_simulator_running,
+        "total_trades": state.trade_count,
+        "current_portfolio_value": portfolio_values[-1] if portfolio_values else state.global_initial_cash,
+        "total_portfolio_values": len(portfolio_values),
+        "initial_cash": state.global_initial_cash
     })
 
 @api_bp.route('/performance-metrics')
+@cached_by_state_version
 def get_performance_metrics():
     """Get detailed performance metrics with enhanced calculations."""
+    state = g.simulator_state
     try:
-        if not simulator_state.portfolio_values or len(simulator_state.portfolio_values) < 2:
+        # Each state accessor returns a copy, so read them once
+        portfolio_values = state.portfolio_values
+        buy_count, sell_count = state.get_trade_type_counts()
+        trade_count = buy_count + sell_count
+        
+        if len(portfolio_values) < 2:
             # Return default metrics when insufficient data
             return jsonify({
-                "initial_value": simulator_state.global_initial_cash,
-                "current_value": simulator_state.global_initial_cash,
+                "initial_value": state.global_initial_cash,
+                "current_value": state.global_initial_cash,
                 "total_return": 0.0,
                 "total_return_percentage": 0.0,
                 "max_drawdown": 0.0,
-                "total_trades": len(simulator_state.trades_list),
-                "buy_trades": len([t for t in simulator_state.trades_list if t['type'] == 'buy']),
-                "sell_trades": len([t for t in simulator_state.trades_list if t['type'] == 'sell']),
+                "total_trades": trade_count,
+                "buy_trades": buy_count,
+                "sell_trades": sell_count,
                 "profitable_trades": 0,
                 "win_rate": 0.0,
                 "avg_trade_return": 0.0,
                 "is_profitable": True
             })
         
-        initial_value = simulator_state.global_initial_cash
-        current_value = simulator_state.portfolio_values[-1] if simulator_state.portfolio_values else simulator_state.global_initial_cash
+        initial_value = state.global_initial_cash
+        current_value = portfolio_values[-1]
         total_return = current_value - initial_value
         total_return_percentage = (total_return / initial_value) * 100
         
-        # Calculate maximum drawdown
-        peak = initial_value
-        max_drawdown = 0
-        for value in simulator_state.portfolio_values:
-            if value > peak:
-                peak = value
-            drawdown = (peak - value) / peak * 100
-            if drawdown > max_drawdown:
-                max_drawdown = drawdown
-        
-        # Calculate win rate from trades
-        buy_trades = [t for t in simulator_state.trades_list if t['type'] == 'buy']
-        sell_trades = [t for t in simulator_state.trades_list if t['type'] == 'sell']
+        # Calculate maximum drawdown against the running peak (never below the initial value)
+        values = np.asarray(portfolio_values, dtype=np.float64)
+        peaks = np.maximum(np.maximum.accumulate(values), initial_value)
+        max_drawdown = float(((peaks - values) / peaks).max() * 100)
         
-        profitable_trades = 0
-        total_trades = min(len(buy_trades), len(sell_trades))
-        
-        for i in range(total_trades):
-            if i < len(buy_trades) and i < len(sell_trades):
-                try:
-                    buy_price = float(buy_trades[i]['price'])
-                    sell_price = float(sell_trades[i]['price'])
-                    if sell_price > buy_price:
-                        profitable_trades += 1
-                except (ValueError, TypeError, KeyError):
-                    # Skip invalid trade data
-                    continue
-        
-        win_rate = (profitable_trades / total_trades * 100) if total_trades > 0 else 0
+        # Calculate win rate over closed lots, matching sells against buys first-in first-out
+        closed_lots, profitable_trades, lot_return_sum = state.get_closed_lot_stats()
+        win_rate = (profitable_trades / closed_lots * 100) if closed_lots > 0 else 0
         
         # Calculate additional metrics
-        avg_trade_return = 0
-        if total_trades > 0:
-            total_trade_returns = []
-            for i in range(total_trades):
-                if i < len(buy_trades) and i < len(sell_trades):
-                    try:
-                        buy_price = float(buy_trades[i]['price'])
-                        sell_price = float(sell_trades[i]['price'])
-                        if buy_price > 0:  # Avoid division by zero
-                            trade_return = (sell_price - buy_price) / buy_price * 100
-                            total_trade_returns.append(trade_return)
-                    except (ValueError, TypeError, KeyError, ZeroDivisionError):
-                        # Skip invalid trade data
-                        continue
-            
-            if total_trade_returns:
-                avg_trade_return = sum(total_trade_returns) / len(total_trade_returns)
+        avg_trade_return = lot_return_sum / closed_lots if closed_lots > 0 else 0
         
         return jsonify({
             "initial_value": initial_value,
@@ -526,9 +574,9 @@ def get_performance_metrics():
             "total_return": total_return,
             "total_return_percentage": total_return_percentage,
             "max_drawdown": max_drawdown,
-            "total_trades": len(simulator_state.trades_list),
-            "buy_trades": len(buy_trades),
-            "sell_trades": len(sell_trades),
+            "total_trades": trade_count,
+            "buy_trades": buy_count,
+            "sell_trades": sell_count,
             "profitable_trades": profitable_trades,
             "win_rate": win_rate,
             "avg_trade_return": avg_trade_return,
@@ -536,30 +584,33 @@ def get_performance_metrics():
         })
         
     except Exception as e:
-        print(f"Error in performance metrics: {e}")
-        # Return a simplified response on error
-        return jsonify({
-            "initial_value": simulator_state.global_initial_cash,
-            "current_value": simulator_state.portfolio_values[-1] if simulator_state.portfolio_values else simulator_state.global_initial_cash,
+        logger.error(f"Error in performance metrics: {e}")
+        # Return a simplified response on error; the dashboard still shows it, but it is never reused
+        response = jsonify({
+            "initial_value": state.global_initial_cash,
+            "current_value": state.portfolio_values[-1] if state.portfolio_values else state.global_initial_cash,
             "total_return": 0.0,
             "total_return_percentage": 0.0,
             "max_drawdown": 0.0,
-            "total_trades": len(simulator_state.trades_list),
-            "buy_trades": len([t for t in simulator_state.trades_list if t['type'] == 'buy']),
-            "sell_trades": len([t for t in simulator_state.trades_list if t['type'] == 'sell']),
+            "total_trades": state.trade_count,
+            "buy_trades": state.get_trade_type_counts()[0],
+            "sell_trades": state.get_trade_type_counts()[1],
             "profitable_trades": 0,
             "win_rate": 0.0,
             "avg_trade_return": 0.0,
             "is_profitable": True,
             "error": str(e)
         })
+        response.cache_control.no_store = True
+        return response
 
 @api_bp.route('/clear-trades', methods=['POST'])
 def clear_trades():
     """Clear all trades."""
+    state = g.simulator_state
     
-    simulator_state.clear_trades()
-    simulator_state.clear_portfolio_values()
+    state.clear_trades()
+    state.clear_portfolio_values()
     
     return jsonify({
         "message": "Trades cleared successfully"
@@ -568,16 +619,14 @@ def clear_trades():
 @api_bp.route('/current-price')
 def get_current_price():
     """Get the current stock price."""
-    if simulator_state.current_data.empty:
+    current_data, _ = g.simulator_state.get_market_data()
+    if current_data.empty:
         return jsonify({
             "error": "No data available"
         }), 404
     
     try:
-        if 'Close' in simulator_state.current_data.columns:
-            current_price = float(simulator_state.current_data.iloc[-1]['Close'])
-        else:
-            current_price = float(simulator_state.current_data.iloc[-1]['price'])
+        current_price = float(current_data['Close'].iat[-1])
         
         return jsonify({
             "current_price": current_price,
@@ -1 +1,6 @@
-# Core trading functionality 
\ No newline at end of file
+# Core trading functionality 
+import pandas as pd
+
+# Copy-on-write lets frames be shared between the cache, the fetcher and the simulator state without
+# defensive copies; data is only copied when one of them modifies it
+pd.set_option("mode.copy_on_write", True)
@@ -1,25 +1,60 @@
 import yfinance as yf
 import pandas as pd
+import os
 import time
+import random
 import logging
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, List
 from functools import lru_cache
 import threading
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Columns every fetched frame must provide
+REQUIRED_COLUMNS = frozenset(("Open", "High", "Low", "Close", "Volume"))
+
+# Buffered columns and the keys they are reported under by get_buffer_data
+BUFFER_COLUMNS = {'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'}
+
+# Positions of a bar and the 3 synthetic points added after it, as fractions of the way to the next bar
+SYNTHETIC_FACTORS = np.arange(4) / 4
+SYNTHETIC_FACTORS.flags.writeable = False
+
+# Fetched data with fewer bars than this gets synthetic points added between them
+SYNTHETIC_POINTS_MAX_BARS = 10
+
+# Maximum number of symbols requested together by DataFetcher.fetch_many
+BATCH_SIZE = 10
+
+# Approximate time span covered by each yfinance period
+PERIOD_SPANS = {
+    '1d': timedelta(days=1),
+    '5d': timedelta(days=5),
+    '1mo': timedelta(days=31),
+    '3mo': timedelta(days=92),
+    '6mo': timedelta(days=183),
+    '1y': timedelta(days=366),
+    '2y': timedelta(days=731),
+    '5y': timedelta(days=1827),
+    '10y': timedelta(days=3653)
+}
+
 class DataFetcher:
     """Enhanced stock data fetcher with improved caching and real-time data handling."""
     
-    def __init__(self, symbol="AAPL", interval="1m", period="1d", max_retries=5, retry_delay=10, start_date=None):
+    def __init__(self, symbol="AAPL", interval="1m", period="1d", max_retries=5, retry_delay=10, start_date=None,
+                 cache_dir=None):
         self.symbol = symbol.upper()
         self.interval = interval
         self.period = period
         self.max_retries = max_retries
         self.retry_delay = retry_delay
         self.start_date = start_date
+        self.cache_dir = cache_dir
+        self.cache_path = os.path.join(cache_dir, f"{self.symbol}_{interval}.pkl") if cache_dir else None
         self.last_data = pd.DataFrame()
         self.last_fetch_time = None
         self._cache = {}
@@ -27,11 +62,19 @@ class DataFetcher:
         self._last_error = None
         self._consecutive_failures = 0
         self._max_cache_age = 30  # Reduced cache time for more frequent updates
-        self._data_buffer = []  # Buffer for storing recent data points
+        self._data_buffer = pd.DataFrame()  # Buffer for storing recent data points, column-wise
         self._max_buffer_size = 100  # Keep last 100 data points
         
         # Validate inputs
         self._validate_parameters()
+        
+        # The historical window never changes, so parse it once rather than on every fetch
+        self._start_dt = self._parse_start_date()
+        
+        # Raw bars kept for incremental fetching of live data
+        self._bars = self._load_bars()
+        self._last_seen_time = None  # Index of the last bar handed out by get_new_bars
+        self._ticker = None  # yf.Ticker reused across polls
     
     def _validate_parameters(self):
         """Validate initialization parameters."""
@@ -48,6 +91,23 @@ class DataFetcher:
         if self.retry_delay < 1:
             raise ValueError("retry_delay must be at least 1")
     
+    def _parse_start_date(self) -> Optional[pd.Timestamp]:
+        """Parse start_date, logging and returning None if it is missing or invalid."""
+        if not self.start_date:
+            return None
+        
+        try:
+            return pd.to_datetime(self.start_date)
+        except Exception as e:
+            logger.error(f"Invalid start date {self.start_date}: {e}")
+            return None
+    
+    def _get_ticker(self) -> yf.Ticker:
+        """Get the ticker for this symbol, creating it on first use."""
+        if self._ticker is None:
+            self._ticker = yf.Ticker(self.symbol)
+        return self._ticker
+    
     def _get_cache_key(self) -> str:
         """Generate cache key for current request."""
         return f"{self.symbol}_{self.interval}_{self.period}_{self.start_date}"
@@ -72,7 +132,7 @@ class DataFetcher:
             
             if self._is_cache_valid(cache_entry):
                 logger.debug(f"Using cached data for {self.symbol}")
-                return cache_entry['data'].copy()
+                return cache_entry['data'].copy(deep=False)
         
         return None
     
@@ -81,7 +141,7 @@ class DataFetcher:
         with self._cache_lock:
             cache_key = self._get_cache_key()
             self._cache[cache_key] = {
-                'data': data.copy(),
+                'data': data.copy(deep=False),
                 'timestamp': time.time()
             }
             
@@ -101,17 +161,18 @@ class DataFetcher:
             del self._cache[key]
     
     def _handle_api_error(self, error: Exception, attempt: int) -> bool:
-        """Handle API errors with exponential backoff."""
+        """Handle API errors with jittered exponential backoff."""
         self._last_error = str(error)
         self._consecutive_failures += 1
         
         logger.warning(f"API error for {self.symbol} (attempt {attempt}/{self.max_retries}): {error}")
         
-        # Exponential backoff
+        # Exponential backoff, jittered so fetchers that failed together do not retry in lockstep
         backoff_delay = min(self.retry_delay * (2 ** (attempt - 1)), 60)
+        backoff_delay *= random.uniform(0.5, 1.5)
         
         if attempt < self.max_retries:
-            logger.info(f"Retrying in {backoff_delay} seconds...")
+            logger.info(f"Retrying in {backoff_delay:.1f} seconds...")
             time.sleep(backoff_delay)
             return True
         
@@ -122,8 +183,7 @@ class DataFetcher:
         if data.empty:
             return False
         
-        required_columns = ["Open", "High", "Low", "Close", "Volume"]
-        if not all(col in data.columns for col in required_columns):
+        if not REQUIRED_COLUMNS.issubset(data.columns):
             logger.error(f"Data missing required columns. Available: {data.columns.tolist()}")
             return False
         
@@ -139,46 +199,31 @@ class DataFetcher:
         return True
     
     def _add_synthetic_data_points(self, data: pd.DataFrame) -> pd.DataFrame:
-        """Add synthetic data points for smoother charts when data is sparse."""
-        if len(data) < 10:  # Only add synthetic points if we have very few data points
-            # Create more data points by interpolating between existing ones
-            extended_data = []
-            
-            for i in range(len(data) - 1):
-                current_row = data.iloc[i]
-                next_row = data.iloc[i + 1]
-                
-                # Add current row
-                extended_data.append(current_row)
-                
-                # Add interpolated points between current and next
-                for j in range(1, 4):  # Add 3 interpolated points
-                    factor = j / 4
-                    interpolated_row = current_row.copy()
-                    
-                    # Interpolate price data
-                    interpolated_row['Open'] = current_row['Open'] + (next_row['Open'] - current_row['Open']) * factor
-                    interpolated_row['High'] = current_row['High'] + (next_row['High'] - current_row['High']) * factor
-                    interpolated_row['Low'] = current_row['Low'] + (next_row['Low'] - current_row['Low']) * factor
-                    interpolated_row['Close'] = current_row['Close'] + (next_row['Close'] - current_row['Close']) * factor
-                    interpolated_row['Volume'] = current_row['Volume'] + (next_row['Volume'] - current_row['Volume']) * factor
-                    
-                    # Create interpolated timestamp
-                    current_time = current_row.name
-                    next_time = next_row.name
-                    time_diff = next_time - current_time
-                    interpolated_time = current_time + time_diff * factor
-                    interpolated_row.name = interpolated_time
-                    
-                    extended_data.append(interpolated_row)
-            
-            # Add the last row
-            if len(data) > 0:
-                extended_data.append(data.iloc[-1])
-            
-            return pd.DataFrame(extended_data)
+        """Add synthetic data points for smoother charts; only called when data is sparse."""
+        if data.empty:
+            return data
         
-        return data
+        # Each bar but the last is followed by 3 points interpolated toward the next bar,
+        # at a quarter, half and three quarters of the way
+        factors = SYNTHETIC_FACTORS
+        sources = np.repeat(np.arange(len(data) - 1), 4)
+        fractions = np.tile(factors, len(data) - 1)
+        
+        # Start from copies of the source rows, so any other columns carry over unchanged
+        extended_data = data.iloc[np.append(sources, len(data) - 1)].astype(float)
+        
+        # Interpolate price data for all points at once
+        columns = ['Open', 'High', 'Low', 'Close', 'Volume']
+        values = data[columns].to_numpy(dtype=np.float64)
+        interpolated = values[:-1, None, :] + np.diff(values, axis=0)[:, None, :] * factors[None, :, None]
+        extended_data[columns] = np.vstack([interpolated.reshape(-1, len(columns)), values[-1:]])
+        
+        # Create interpolated timestamps
+        current_times = data.index[sources]
+        interpolated_times = current_times + (data.index[sources + 1] - current_times) * fractions
+        extended_data.index = interpolated_times.append(data.index[-1:])
+        
+        return extended_data
     
     def get_real_time_data(self) -> pd.DataFrame:
         """Fetch real-time stock data with enhanced error handling and data smoothing."""
@@ -190,7 +235,7 @@ class DataFetcher:
         # Fetch fresh data
         for attempt in range(1, self.max_retries + 1):
             try:
-                stock = yf.Ticker(self.symbol)
+                stock = self._get_ticker()
                 
                 if self.start_date:
                     data = self._fetch_historical_data(stock, attempt)
@@ -198,25 +243,7 @@ class DataFetcher:
                     data = self._fetch_current_data(stock, attempt)
                 
                 if not data.empty and self._validate_data(data):
-                    # Add synthetic data points for smoother charts
-                    data = self._add_synthetic_data_points(data)
-                    
-                    # Update data buffer
-                    self._update_data_buffer(data)
-                    
-                    # Reset error counters on success
-                    self._consecutive_failures = 0
-                    self._last_error = None
-                    
-                    # Cache the data
-                    self._cache_data(data)
-                    
-                    # Update last data
-                    self.last_data = data.copy()
-                    self.last_fetch_time = datetime.now()
-                    
-                    logger.info(f"Successfully fetched {len(data)} rows for {self.symbol}")
-                    return data
+                    return self._accept_data(data)
                 
                 else:
                     logger.warning(f"Empty or invalid data received for {self.symbol}")
@@ -226,6 +253,10 @@ class DataFetcher:
             except Exception as e:
                 if not self._handle_api_error(e, attempt):
                     break
+            
+            # Rebuild the ticker once in case its state went stale, then keep reusing it
+            if attempt == 1:
+                self._ticker = None
         
         # Return last valid data if available
         if not self.last_data.empty:
@@ -235,37 +266,141 @@ class DataFetcher:
         logger.error(f"Failed to fetch data for {self.symbol} after {self.max_retries} attempts")
         return pd.DataFrame()
     
+    def _accept_data(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Process freshly fetched, validated bars and make them the current data."""
+        # Keep the raw bars so the next poll only requests newer ones
+        if not self.start_date:
+            self._store_bars(data)
+        
+        # Add synthetic data points for smoother charts, only worth it when there are very few bars
+        if len(data) < SYNTHETIC_POINTS_MAX_BARS:
+            data = self._add_synthetic_data_points(data)
+        
+        # Update data buffer
+        self._update_data_buffer(data)
+        
+        # Reset error counters on success
+        self._consecutive_failures = 0
+        self._last_error = None
+        
+        # Cache the data
+        self._cache_data(data)
+        
+        # Update last data
+        self.last_data = data.copy(deep=False)
+        self.last_fetch_time = datetime.now()
+        
+        logger.info(f"Successfully fetched {len(data)} rows for {self.symbol}")
+        return data
+    
+    @staticmethod
+    def fetch_many(fetchers: List['DataFetcher']) -> Dict[str, pd.DataFrame]:
+        """Refresh several live fetchers with one yf.download request per batch of symbols.
+        
+        Fetchers sharing an interval and period are fetched together, BATCH_SIZE
+        symbols at a time, and each one's cache is filled so its next
+        get_real_time_data call is served without a request of its own. Fetchers
+        for a historical date, with fresh cached data, or missing from the
+        response are left alone. Returns the new data by symbol.
+        """
+        groups = {}
+        for fetcher in fetchers:
+            if fetcher.start_date or fetcher._get_cached_data() is not None:
+                continue
+            groups.setdefault((fetcher.interval, fetcher._get_extended_period()), []).append(fetcher)
+        
+        results = {}
+        for (interval, period), group in groups.items():
+            for start in range(0, len(group), BATCH_SIZE):
+                batch = group[start:start + BATCH_SIZE]
+                symbols = list(dict.fromkeys(fetcher.symbol for fetcher in batch))
+                try:
+                    data = yf.download(" ".join(symbols), period=period, interval=interval, group_by='ticker',
+                                       auto_adjust=True, threads=False, progress=False)
+                except Exception as e:
+                    logger.error(f"Error fetching batch {symbols}: {e}")
+                    continue
+                
+                if data is None or data.empty:
+                    logger.warning(f"Empty batch data received for {symbols}")
+                    continue
+                
+                for fetcher in batch:
+                    if isinstance(data.columns, pd.MultiIndex):
+                        if fetcher.symbol not in data.columns.get_level_values(0):
+                            continue
+                        symbol_data = data[fetcher.symbol]
+                    else:
+                        symbol_data = data
+                    
+                    # Symbols share one index, so drop the timestamps this one has no bar for
+                    symbol_data = symbol_data.dropna(how='all')
+                    if not symbol_data.empty and fetcher._validate_data(symbol_data):
+                        results[fetcher.symbol] = fetcher._accept_data(symbol_data)
+        
+        return results
+    
+    @staticmethod
+    def fetch_all(fetchers: List['DataFetcher'], max_workers: int = BATCH_SIZE) -> List[pd.DataFrame]:
+        """Get the data of several fetchers concurrently, in the order given.
+        
+        Live fetchers are first refreshed together through fetch_many; whatever is
+        left (historical dates, symbols missing from a batch) is fetched on up to
+        max_workers threads, since each fetch mostly waits on the network.
+        """
+        if not fetchers:
+            return []
+        
+        DataFetcher.fetch_many(fetchers)
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(fetchers))) as executor:
+            return list(executor.map(lambda fetcher: fetcher.get_real_time_data(), fetchers))
+    
+    def get_new_bars(self) -> pd.DataFrame:
+        """Fetch data and return only the bars not handed out by a previous call."""
+        data = self.get_real_time_data()
+        if data.empty:
+            return data
+        
+        new_bars = data if self._last_seen_time is None else data[data.index > self._last_seen_time]
+        self._last_seen_time = data.index[-1]
+        return new_bars
+    
     def _update_data_buffer(self, data: pd.DataFrame):
         """Update the data buffer with new data points."""
         if not data.empty:
-            # Add new data points to buffer
-            for _, row in data.iterrows():
-                self._data_buffer.append({
-                    'timestamp': row.name,
-                    'open': row['Open'],
-                    'high': row['High'],
-                    'low': row['Low'],
-                    'close': row['Close'],
-                    'volume': row['Volume']
-                })
+            # Only the newest max_buffer_size points can survive the trim, so take just those
+            recent = data[list(BUFFER_COLUMNS)].iloc[-self._max_buffer_size:]
+            
+            # Keep older buffered points only when the new data does not fill the buffer
+            if len(recent) < self._max_buffer_size and not self._data_buffer.empty:
+                recent = pd.concat([self._data_buffer, recent]).iloc[-self._max_buffer_size:]
             
-            # Keep only the last max_buffer_size points
-            if len(self._data_buffer) > self._max_buffer_size:
-                self._data_buffer = self._data_buffer[-self._max_buffer_size:]
+            self._data_buffer = recent
     
     def _fetch_historical_data(self, stock: yf.Ticker, attempt: int) -> pd.DataFrame:
         """Fetch historical data for a specific date with enhanced period handling."""
         try:
-            start_dt = pd.to_datetime(self.start_date)
+            start_dt = self._start_dt
+            if start_dt is None:
+                return pd.DataFrame()
             end_dt = start_dt + timedelta(days=1)
+            now = datetime.now()
             
             # Check if date is in the future
-            if start_dt > datetime.now():
+            if start_dt > now:
                 logger.error(f"Cannot fetch data for future date {self.start_date}")
                 return pd.DataFrame()
             
+            # Bars of a day that is already over never change, so a disk copy can be served as is
+            cache_path = self._get_historical_cache_path(start_dt)
+            if cache_path and os.path.exists(cache_path):
+                data = self._read_cached_frame(cache_path)
+                if not data.empty:
+                    logger.info(f"Loaded {len(data)} cached historical rows for {self.symbol} on {self.start_date}")
+                    return data
+            
             # Check if date is too old for 1m data
-            days_diff = (datetime.now() - start_dt).days
+            days_diff = (now - start_dt).days
             if days_diff > 30 and self.interval == "1m":
                 logger.warning(f"1m data only available for last 30 days. Using 1d data for {self.start_date}")
                 data = stock.history(start=start_dt, end=end_dt, interval="1d")
@@ -283,9 +418,12 @@ class DataFetcher:
                         start_dt_naive = start_dt.tz_localize(None)
                     else:
                         start_dt_naive = start_dt
-                    data = data[data.index >= start_dt_naive]
+                    # Bars come sorted by time, so the cut-off is a binary search rather than a full mask
+                    data = data.iloc[data.index.searchsorted(start_dt_naive):]
             
             logger.info(f"Fetched {len(data)} historical rows for {self.symbol} on {self.start_date}")
+            if cache_path and not data.empty:
+                self._write_cached_frame(data, cache_path)
             return data
             
         except Exception as e:
@@ -293,8 +431,16 @@ class DataFetcher:
             return pd.DataFrame()
     
     def _fetch_current_data(self, stock: yf.Ticker, attempt: int) -> pd.DataFrame:
-        """Fetch current real-time data with enhanced period handling."""
+        """Fetch current real-time data, requesting only bars newer than the ones already held."""
         try:
+            if self._can_fetch_incrementally():
+                # Re-request the last bar as well since it may still have been forming
+                start = self._bars.index[-1]
+                new_data = stock.history(start=start, interval=self.interval)
+                data = self._merge_bars(new_data)
+                logger.info(f"Fetched {len(new_data)} new rows for {self.symbol} since {start}")
+                return data
+            
             # Use a longer period to get more data points for smoother charts
             extended_period = self._get_extended_period()
             data = stock.history(period=extended_period, interval=self.interval)
@@ -320,10 +466,99 @@ class DataFetcher:
         
         return period_mapping.get(self.period, self.period)
     
+    def _can_fetch_incrementally(self) -> bool:
+        """Check whether the held bars are recent enough to be extended instead of refetched."""
+        if self._bars.empty:
+            return False
+        
+        span = PERIOD_SPANS.get(self._get_extended_period())
+        if span is None:
+            return True
+        
+        now = pd.Timestamp.now(tz=self._bars.index.tz)
+        return now - self._bars.index[-1] < span
+    
+    def _merge_bars(self, new_data: pd.DataFrame) -> pd.DataFrame:
+        """Append newly fetched bars to the held ones, keeping the extended period window."""
+        if new_data.empty:
+            return self._bars
+        
+        merged = pd.concat([self._bars, new_data])
+        merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+        
+        span = PERIOD_SPANS.get(self._get_extended_period())
+        if span is not None:
+            merged = merged[merged.index >= merged.index[-1] - span]
+        
+        return merged
+    
+    def _get_historical_cache_path(self, start_dt: pd.Timestamp) -> Optional[str]:
+        """Get the on-disk cache file for a historical day, or None if the day is not over yet."""
+        if not self.cache_dir or start_dt.normalize() >= pd.Timestamp.now().normalize():
+            return None
+        return os.path.join(self.cache_dir, f"{self.symbol}_{self.interval}_{start_dt:%Y-%m-%d}.pkl")
+    
+    def _read_cached_frame(self, path: str) -> pd.DataFrame:
+        """Read a frame from the on-disk cache, treating unreadable files as a miss."""
+        try:
+            return pd.read_pickle(path)
+        except Exception as e:
+            logger.warning(f"Could not load cached bars from {path}: {e}")
+            return pd.DataFrame()
+    
+    def _write_cached_frame(self, data: pd.DataFrame, path: str):
+        """Write a frame to the on-disk cache atomically so readers never see a partial file."""
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            data.to_pickle(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Could not write cached bars to {path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    def _load_bars(self) -> pd.DataFrame:
+        """Load previously fetched bars from the on-disk cache."""
+        if not self.cache_path or self.start_date or not os.path.exists(self.cache_path):
+            return pd.DataFrame()
+        
+        bars = self._read_cached_frame(self.cache_path)
+        if not bars.empty:
+            logger.info(f"Loaded {len(bars)} cached rows for {self.symbol} from {self.cache_path}")
+        return bars
+    
+    def _store_bars(self, data: pd.DataFrame):
+        """Keep the raw bars in memory and persist them to the on-disk cache."""
+        self._bars = data
+        
+        if self.cache_path:
+            self._write_cached_frame(data, self.cache_path)
+    
+    def _get_quote_price(self) -> Optional[float]:
+        """Get the last traded price from yfinance's lightweight quote endpoint."""
+        # A quote is only meaningful for live data, not for a historical date
+        if self.start_date:
+            return None
+        
+        try:
+            price = float(self._get_ticker().fast_info['last_price'])
+        except Exception as e:
+            logger.debug(f"Quote unavailable for {self.symbol}: {e}")
+            return None
+        
+        return None if pd.isna(price) else price
+    
     def get_latest_price(self) -> Optional[float]:
         """Get the most recent closing price with error handling."""
         try:
-            data = self.get_real_time_data()
+            # Fresh cached bars are cheapest, then a single quote, then a full history fetch
+            data = self._get_cached_data()
+            if data is None:
+                quote_price = self._get_quote_price()
+                if quote_price is not None:
+                    return quote_price
+                data = self.get_real_time_data()
             if not data.empty and len(data) > 0:
                 if "Close" in data.columns:
                     latest_price = data["Close"].iloc[-1]
@@ -356,7 +591,11 @@ class DataFetcher:
     
     def get_buffer_data(self) -> List[Dict[str, Any]]:
         """Get the buffered data for real-time updates."""
-        return self._data_buffer.copy()
+        buffer = self._data_buffer.rename(columns=BUFFER_COLUMNS)
+        return [
+            {'timestamp': timestamp, **record}
+            for timestamp, record in zip(buffer.index, buffer.to_dict('records'))
+        ]
     
     def clear_cache(self):
         """Clear the data cache."""
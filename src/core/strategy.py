@@ -1,8 +1,28 @@
 import pandas as pd
 import numpy as np
 import logging
+import threading
+from collections import OrderedDict, deque
 from typing import Dict, Any, Optional, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+from .strategy_kernels import NUMBA_AVAILABLE, apply_signals, get_kernel, position_size, rsi_ewm
+
+# Bottleneck is optional; its moving-window functions run on the raw array without pandas' rolling setup
+try:
+    import bottleneck as bn
+except ImportError:
+    bn = None
+
+# Window of the rolling price standard deviation reported as volatility
+VOLATILITY_WINDOW = 20
+
+# Number of generate_signals results kept for frames that are queried again
+SIGNAL_CACHE_SIZE = 8
+
+# Shared by every strategy instance, since the app builds a new one per run and per request;
+# keys carry the parameters, so instances with different settings never share an entry
+_signal_cache = OrderedDict()  # Least recently used results first
+_signal_cache_lock = threading.Lock()
 
 logger = logging.getLogger(__name__)
 
@@ -28,11 +48,35 @@ class TradingStrategy:
         self.previous_signal = 0
         self.entry_price = None
         self.position_open = False
-        self._signal_cache = {}
         self._last_calculation_time = None
         
         # Validate parameters
         self._validate_parameters()
+        self._reset_incremental_state()
+    
+    def _reset_incremental_state(self):
+        """Reset the running indicator state used by push_price."""
+        self._short_prices = deque(maxlen=self.short_window)
+        self._long_prices = deque(maxlen=self.long_window)
+        self._sum_short = 0.0
+        self._sum_long = 0.0
+        self._count_short = 0  # Non-NaN prices in each window
+        self._count_long = 0
+        self._volatility_prices = deque(maxlen=VOLATILITY_WINDOW)
+        self._volatility_mean = 0.0
+        self._volatility_m2 = 0.0  # Sum of squared deviations from the window mean
+        self._momentum_prices = deque(maxlen=4)
+        self._short_ma_history = deque(maxlen=3)
+        self._avg_gain = None
+        self._avg_loss = None
+        self._last_price = None
+        self._last_valid_price = np.nan  # Momentum is taken over forward-filled values, as pct_change does
+        self._last_valid_short_ma = np.nan
+        self._prev_short_ma = None
+        self._prev_long_ma = None
+        self._price_count = 0
+        # Window sizes may have changed, so pick up the kernel compiled for them
+        self._kernel = get_kernel(self.short_window, self.long_window) if NUMBA_AVAILABLE else None
     
     def _validate_parameters(self):
         """Validate strategy parameters."""
@@ -77,6 +121,16 @@ class TradingStrategy:
             # Create signals DataFrame with optimized operations
             signals = self._create_signals_dataframe(data)
             
+            # The same prices from the same position state always give the same result
+            cache_key = self._get_signal_cache_key(signals["price"])
+            with _signal_cache_lock:
+                cached = _signal_cache.get(cache_key)
+                if cached is not None:
+                    _signal_cache.move_to_end(cache_key)
+            if cached is not None:
+                result, (self.previous_signal, self.position_open, self.entry_price) = cached
+                return replace(result, signals=result.signals.copy(deep=False))
+            
             # Calculate technical indicators efficiently
             signals = self._calculate_indicators(signals)
             
@@ -84,19 +138,22 @@ class TradingStrategy:
             signals = self._generate_trading_signals(signals)
             
             # Count signals
-            buy_signals = len(signals[signals['signal'] == 1])
-            sell_signals = len(signals[signals['signal'] == -1])
+            signal_values = signals['signal'].to_numpy()
+            buy_signals = int(np.count_nonzero(signal_values == 1))
+            sell_signals = int(np.count_nonzero(signal_values == -1))
             total_signals = buy_signals + sell_signals
             
             logger.info(f"Generated {total_signals} signals ({buy_signals} buy, {sell_signals} sell)")
             
-            return SignalResult(
+            result = SignalResult(
                 signals=signals,
                 buy_signals=buy_signals,
                 sell_signals=sell_signals,
                 total_signals=total_signals,
                 success=True
             )
+            self._cache_signal_result(cache_key, result)
+            return replace(result, signals=signals.copy(deep=False))
             
         except Exception as e:
             logger.error(f"Error generating signals: {e}")
@@ -109,6 +166,20 @@ class TradingStrategy:
                 error_message=str(e)
             )
     
+    def _get_signal_cache_key(self, prices: pd.Series) -> Tuple:
+        """Identify prices by a hash of their values and timestamps, plus the parameters and position state they start from."""
+        content_hash = hash(pd.util.hash_pandas_object(prices, index=True).to_numpy().tobytes())
+        return (self.short_window, self.long_window, self.profit_threshold, self.stop_loss, self.rsi_window,
+                len(prices), content_hash, self.previous_signal, self.position_open, self.entry_price)
+    
+    def _cache_signal_result(self, cache_key: Tuple, result: SignalResult):
+        """Keep a result with the position state it ended in, evicting the least recently used."""
+        with _signal_cache_lock:
+            _signal_cache[cache_key] = (result, (self.previous_signal, self.position_open, self.entry_price))
+            _signal_cache.move_to_end(cache_key)
+            while len(_signal_cache) > SIGNAL_CACHE_SIZE:
+                _signal_cache.popitem(last=False)
+    
     def _create_signals_dataframe(self, data: pd.DataFrame) -> pd.DataFrame:
         """Create optimized signals DataFrame."""
         # Use only required columns to reduce memory usage
@@ -124,22 +195,42 @@ class TradingStrategy:
     def _calculate_indicators(self, signals: pd.DataFrame) -> pd.DataFrame:
         """Calculate technical indicators efficiently."""
         try:
-            # Calculate moving averages with optimized rolling operations
-            signals["short_ma"] = signals["price"].rolling(
-                window=self.short_window, 
-                min_periods=1
-            ).mean()
-            
-            signals["long_ma"] = signals["price"].rolling(
-                window=self.long_window, 
-                min_periods=1
-            ).mean()
+            if self._kernel is not None:
+                # Compiled single pass for both moving averages and their crossovers
+                short_ma, long_ma, crossover = self._kernel(signals["price"].to_numpy(dtype=np.float64))
+                signals["short_ma"] = short_ma
+                signals["long_ma"] = long_ma
+                signals["crossover"] = crossover
+            elif bn is not None:
+                # generate_signals guarantees at least long_window rows, so both windows fit
+                prices = signals["price"].to_numpy(dtype=np.float64)
+                signals["short_ma"] = bn.move_mean(prices, self.short_window, min_count=1)
+                signals["long_ma"] = bn.move_mean(prices, self.long_window, min_count=1)
+                signals = self._detect_crossovers(signals)
+            else:
+                # Calculate moving averages with optimized rolling operations
+                signals["short_ma"] = signals["price"].rolling(
+                    window=self.short_window, 
+                    min_periods=1
+                ).mean()
+                
+                signals["long_ma"] = signals["price"].rolling(
+                    window=self.long_window, 
+                    min_periods=1
+                ).mean()
+                
+                # Detect crossovers efficiently using vectorized operations
+                signals = self._detect_crossovers(signals)
             
             # Calculate RSI
             signals["rsi"] = self._calculate_rsi_optimized(signals["price"])
             
             # Calculate volatility (rolling standard deviation)
-            signals["volatility"] = signals["price"].rolling(window=20).std()
+            if bn is not None and len(signals) >= VOLATILITY_WINDOW:
+                signals["volatility"] = bn.move_std(signals["price"].to_numpy(dtype=np.float64),
+                                                    VOLATILITY_WINDOW, ddof=1)
+            else:
+                signals["volatility"] = signals["price"].rolling(window=VOLATILITY_WINDOW).std()
             
             # Calculate momentum indicators
             signals["price_momentum"] = signals["price"].pct_change(periods=3)
@@ -161,6 +252,10 @@ class TradingStrategy:
             if len(prices) < self.rsi_window + 1:
                 return pd.Series([np.nan] * len(prices), index=prices.index)
             
+            if NUMBA_AVAILABLE:
+                # Compiled single pass over both gains and losses
+                return pd.Series(rsi_ewm(prices.to_numpy(dtype=np.float64), self.rsi_window), index=prices.index)
+            
             # Calculate price changes
             delta = prices.diff()
             
@@ -185,64 +280,212 @@ class TradingStrategy:
     def _generate_trading_signals(self, signals: pd.DataFrame) -> pd.DataFrame:
         """Generate trading signals with improved logic."""
         try:
-            # Initialize signal columns
-            signals["crossover"] = 0
-            signals["signal"] = 0
-            
-            # Detect crossovers efficiently using vectorized operations
-            signals = self._detect_crossovers(signals)
-            
-            # Apply signal generation logic
-            for i in range(len(signals)):
-                current_price = signals["price"].iloc[i]
-                rsi = signals["rsi"].iloc[i]
-                crossover = signals["crossover"].iloc[i]
-                price_momentum = signals["price_momentum"].iloc[i]
-                ma_momentum = signals["ma_momentum"].iloc[i]
-                
-                # Buy signal conditions
-                if self._should_buy(crossover, rsi, price_momentum, ma_momentum):
-                    signals.loc[signals.index[i], "signal"] = 1
-                    self.previous_signal = 1
-                    self.entry_price = current_price
-                    self.position_open = True
-                    logger.debug(f"Buy signal generated at price ${current_price:.2f}")
-                
-                # Sell signal conditions
-                elif self._should_sell(crossover, rsi, current_price):
-                    signals.loc[signals.index[i], "signal"] = -1
-                    self.previous_signal = -1
-                    self.position_open = False
-                    self.entry_price = None
-                    logger.debug(f"Sell signal generated at price ${current_price:.2f}")
-            
+            if NUMBA_AVAILABLE:
+                # Compiled sequential pass, carrying the position state in and out
+                signal_values, self.previous_signal, self.position_open, entry_price = apply_signals(
+                    signals["price"].to_numpy(dtype=np.float64),
+                    signals["rsi"].to_numpy(dtype=np.float64),
+                    signals["crossover"].to_numpy(dtype=np.int64),
+                    signals["price_momentum"].to_numpy(dtype=np.float64),
+                    signals["ma_momentum"].to_numpy(dtype=np.float64),
+                    self.profit_threshold,
+                    self.stop_loss,
+                    self.previous_signal,
+                    self.position_open,
+                    np.nan if self.entry_price is None else self.entry_price
+                )
+                self.entry_price = None if np.isnan(entry_price) else entry_price
+            else:
+                # The decision is sequential (it depends on the open position), so walk plain
+                # lists instead of indexing the frame per row
+                columns = [
+                    signals[column].to_numpy().tolist()
+                    for column in ("price", "rsi", "crossover", "price_momentum", "ma_momentum")
+                ]
+                signal_values = np.zeros(len(signals), dtype=np.int64)
+                for i, row in enumerate(zip(*columns)):
+                    signal_values[i] = self._apply_signal(*row)
+            
+            signals["signal"] = signal_values
             return signals
             
         except Exception as e:
             logger.error(f"Error generating trading signals: {e}")
             raise
     
+    def _apply_signal(self, current_price: float, rsi: float, crossover: int,
+                      price_momentum: float, ma_momentum: float) -> int:
+        """Decide the signal for one bar and update the position state accordingly."""
+        # Buy signal conditions
+        if self._should_buy(crossover, rsi, price_momentum, ma_momentum):
+            self.previous_signal = 1
+            self.entry_price = current_price
+            self.position_open = True
+            logger.debug(f"Buy signal generated at price ${current_price:.2f}")
+            return 1
+        
+        # Sell signal conditions
+        if self._should_sell(crossover, rsi, current_price):
+            self.previous_signal = -1
+            self.position_open = False
+            self.entry_price = None
+            logger.debug(f"Sell signal generated at price ${current_price:.2f}")
+            return -1
+        
+        return 0
+    
+    def prime_indicators(self, prices):
+        """Seed the running indicators from past prices without generating signals."""
+        self._reset_incremental_state()
+        for price in prices:
+            self._update_indicators(price)
+    
+    @staticmethod
+    def _slide_window(window: deque, price: float, total: float, count: int) -> Tuple[float, int]:
+        """Append a price to a fixed-size window and return its updated sum and count of non-NaN prices."""
+        if len(window) == window.maxlen:
+            old = window[0]
+            if not np.isnan(old):
+                total -= old
+                count -= 1
+        window.append(price)
+        if not np.isnan(price):
+            total += price
+            count += 1
+        
+        # Start from an exact zero once the window holds no valid price, so rounding cannot accumulate
+        if count == 0:
+            total = 0.0
+        return total, count
+    
+    def _update_volatility(self, price: float) -> float:
+        """Slide the volatility window by one price with Welford's update and return its sample std."""
+        window = self._volatility_prices
+        mean = self._volatility_mean
+        
+        if len(window) == window.maxlen:
+            old = window[0]
+            window.append(price)
+            new_mean = mean + (price - old) / len(window)
+            self._volatility_m2 += (price - old) * (price - new_mean + old - mean)
+        else:
+            window.append(price)
+            new_mean = mean + (price - mean) / len(window)
+            self._volatility_m2 += (price - mean) * (price - new_mean)
+        self._volatility_mean = new_mean
+        
+        # A NaN price poisons the running sums, so recompute them until it has left the window
+        if np.isnan(self._volatility_m2):
+            values = np.array(window)
+            self._volatility_mean = values.mean()
+            self._volatility_m2 = ((values - self._volatility_mean) ** 2).sum()
+        
+        if len(window) < window.maxlen:
+            return np.nan
+        return float(np.sqrt(max(self._volatility_m2, 0.0) / (len(window) - 1)))
+    
+    def push_price(self, price: float) -> Dict[str, Any]:
+        """Advance the running indicators by one bar in O(1) and return that bar's signals row."""
+        row = self._update_indicators(price)
+        
+        # Same minimum history generate_signals requires before it emits anything
+        row["signal"] = 0
+        if self._price_count >= self.long_window:
+            row["signal"] = self._apply_signal(
+                row["price"], row["rsi"], row["crossover"], row["price_momentum"], row["ma_momentum"]
+            )
+        return row
+    
+    def _update_indicators(self, price: float) -> Dict[str, Any]:
+        """Update the running indicators with one price, mirroring _calculate_indicators."""
+        price = float(price)
+        
+        # Moving averages from running sums over fixed-size windows; NaN prices are skipped
+        # like rolling(min_periods=1) does, and a window without valid prices has no average
+        self._sum_short, self._count_short = self._slide_window(
+            self._short_prices, price, self._sum_short, self._count_short)
+        self._sum_long, self._count_long = self._slide_window(
+            self._long_prices, price, self._sum_long, self._count_long)
+        
+        short_ma = self._sum_short / self._count_short if self._count_short else np.nan
+        long_ma = self._sum_long / self._count_long if self._count_long else np.nan
+        
+        # RSI from exponential averages of gains and losses (ewm with adjust=False); a change
+        # from or to a NaN price counts as neither gain nor loss, as with delta.where()
+        delta = price - self._last_price if self._last_price is not None else np.nan
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        if self._avg_gain is None:
+            self._avg_gain, self._avg_loss = gain, loss
+        else:
+            alpha = 2 / (self.rsi_window + 1)
+            self._avg_gain += alpha * (gain - self._avg_gain)
+            self._avg_loss += alpha * (loss - self._avg_loss)
+        self._last_price = price
+        self._price_count += 1
+        
+        rsi = np.nan
+        if self._price_count >= self.rsi_window + 1:
+            if self._avg_loss > 0:
+                rsi = 100 - (100 / (1 + self._avg_gain / self._avg_loss))
+            elif self._avg_gain > 0:
+                rsi = 100.0
+        
+        # Volatility over the last 20 prices
+        volatility = self._update_volatility(price)
+        
+        # Momentum indicators over forward-filled values, with missing momentum as 0
+        if not np.isnan(price):
+            self._last_valid_price = price
+        if not np.isnan(short_ma):
+            self._last_valid_short_ma = short_ma
+        self._momentum_prices.append(self._last_valid_price)
+        self._short_ma_history.append(self._last_valid_short_ma)
+        price_momentum = 0.0
+        if len(self._momentum_prices) == self._momentum_prices.maxlen:
+            price_momentum = self._last_valid_price / self._momentum_prices[0] - 1
+        ma_momentum = 0.0
+        if len(self._short_ma_history) == self._short_ma_history.maxlen:
+            ma_momentum = self._last_valid_short_ma / self._short_ma_history[0] - 1
+        if np.isnan(price_momentum):
+            price_momentum = 0.0
+        if np.isnan(ma_momentum):
+            ma_momentum = 0.0
+        
+        # Crossover against the previous bar's moving averages
+        crossover = 0
+        if self._prev_short_ma is not None:
+            if short_ma > long_ma and self._prev_short_ma < self._prev_long_ma:
+                crossover = 1
+            elif short_ma < long_ma and self._prev_short_ma > self._prev_long_ma:
+                crossover = -1
+        self._prev_short_ma = short_ma
+        self._prev_long_ma = long_ma
+        
+        return {
+            "price": price,
+            "short_ma": short_ma,
+            "long_ma": long_ma,
+            "rsi": rsi,
+            "volatility": volatility,
+            "price_momentum": price_momentum,
+            "ma_momentum": ma_momentum,
+            "crossover": crossover
+        }
+    
     def _detect_crossovers(self, signals: pd.DataFrame) -> pd.DataFrame:
         """Detect moving average crossovers efficiently."""
         try:
-            # Calculate crossover conditions
-            short_above_long = signals["short_ma"] > signals["long_ma"]
-            short_below_long = signals["short_ma"] < signals["long_ma"]
-            
-            # Detect crossovers using shift operations
-            prev_short_above_long = short_above_long.shift(1)
-            prev_short_below_long = short_below_long.shift(1)
-            
-            # Golden cross (short MA crosses above long MA)
-            golden_cross = short_above_long & prev_short_below_long
+            # Side of the long MA the short MA is on: 1 above, -1 below, 0 level, NaN before both exist
+            side = np.sign(signals["short_ma"].to_numpy() - signals["long_ma"].to_numpy())
             
-            # Death cross (short MA crosses below long MA)
-            death_cross = short_below_long & prev_short_above_long
-            
-            # Set crossover values
-            signals.loc[golden_cross, "crossover"] = 1
-            signals.loc[death_cross, "crossover"] = -1
+            # A cross moves from strictly one side to the other since the previous bar (compared through
+            # offset views; the first bar has none), and the new side is its direction
+            crossover = np.zeros(len(signals), dtype=np.int64)
+            crossed = side[1:] * side[:-1] == -1
+            crossover[1:][crossed] = side[1:][crossed]
             
+            signals["crossover"] = crossover
             return signals
             
         except Exception as e:
@@ -291,25 +534,8 @@ class TradingStrategy:
     def get_position_size(self, cash: float, price: float, risk_per_trade: float = 0.02) -> int:
         """Calculate position size based on risk management."""
         try:
-            if price <= 0 or cash <= 0:
-                return 0
-            
-            # Calculate minimum position size (at least 1 share)
-            min_shares = 1
-            
-            # Risk 2% of portfolio per trade, but ensure minimum position
-            risk_amount = cash * risk_per_trade
-            position_size = int(risk_amount / price)
-            
-            # Ensure we don't exceed available cash
-            max_shares = int(cash / price)
-            
-            # Use the larger of minimum shares or risk-based calculation
-            final_size = max(min_shares, min(position_size, max_shares))
-            
-            # Ensure we have enough cash for at least 1 share
-            if final_size * price > cash:
-                final_size = max_shares
+            # Risk-based size of at least one share, capped by the cash available
+            final_size = position_size(cash, price, risk_per_trade)
             
             logger.debug(f"Position size calculated: {final_size} shares (cash: ${cash}, price: ${price})")
             return final_size
@@ -318,6 +544,20 @@ class TradingStrategy:
             logger.error(f"Error calculating position size: {e}")
             return 0
     
+    def get_position_sizes(self, cash: np.ndarray, prices: np.ndarray, risk_per_trade: float = 0.02) -> np.ndarray:
+        """Position sizes for many cash/price pairs at once, with the same rules as get_position_size."""
+        cash = np.asarray(cash, dtype=np.float64)
+        prices = np.asarray(prices, dtype=np.float64)
+        valid = (prices > 0) & (cash > 0)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            risk_shares = np.floor(cash * risk_per_trade / prices)
+            max_shares = np.floor(cash / prices)
+            shares = np.maximum(1, np.minimum(risk_shares, max_shares))
+            shares = np.where(shares * prices > cash, max_shares, shares)
+        
+        return np.where(valid, shares, 0).astype(np.int64)
+    
     def get_strategy_summary(self) -> Dict[str, Any]:
         """Get a summary of the current strategy state."""
         return {
@@ -329,7 +569,7 @@ class TradingStrategy:
             'previous_signal': self.previous_signal,
             'entry_price': self.entry_price,
             'position_open': self.position_open,
-            'cache_size': len(self._signal_cache)
+            'cache_size': len(_signal_cache)
         }
     
     def reset_strategy(self):
@@ -337,8 +577,8 @@ class TradingStrategy:
         self.previous_signal = 0
         self.entry_price = None
         self.position_open = False
-        self._signal_cache.clear()
         self._last_calculation_time = None
+        self._reset_incremental_state()
         logger.info("Strategy state reset")
     
     def update_parameters(self, **kwargs):
@@ -358,8 +598,8 @@ class TradingStrategy:
             # Validate updated parameters
             self._validate_parameters()
             
-            # Clear cache when parameters change
-            self._signal_cache.clear()
+            # Running indicators depend on the windows; cached results are keyed by the parameters
+            self._reset_incremental_state()
             
             logger.info(f"Strategy parameters updated: {kwargs}")
             
@@ -0,0 +1,221 @@
+import numpy as np
+from functools import lru_cache
+
+# Numba is optional; without it the strategy keeps its pandas implementation
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    
+    def njit(*args, **kwargs):
+        """Stand-in decorator that leaves the function as plain Python."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+def _make_kernel(short_window, long_window):
+    """Compile the moving-average kernel with both window sizes baked in as constants."""
+    
+    @njit
+    def moving_averages_and_crossovers(prices):
+        """Short/long moving averages and their crossovers in a single pass.
+        
+        Matches rolling(window, min_periods=1).mean(): NaN prices are skipped and a
+        window with no valid prices yields NaN. Crossover is 1 where the short MA
+        moves above the long MA, -1 where it moves below, 0 otherwise.
+        """
+        n = prices.shape[0]
+        short_ma = np.empty(n, dtype=np.float64)
+        long_ma = np.empty(n, dtype=np.float64)
+        crossover = np.zeros(n, dtype=np.int64)
+        
+        sum_short = 0.0
+        sum_long = 0.0
+        count_short = 0
+        count_long = 0
+        
+        for i in range(n):
+            price = prices[i]
+            if not np.isnan(price):
+                sum_short += price
+                sum_long += price
+                count_short += 1
+                count_long += 1
+            
+            # Drop the prices leaving each window
+            if i >= short_window:
+                old = prices[i - short_window]
+                if not np.isnan(old):
+                    sum_short -= old
+                    count_short -= 1
+            if i >= long_window:
+                old = prices[i - long_window]
+                if not np.isnan(old):
+                    sum_long -= old
+                    count_long -= 1
+            
+            short_ma[i] = sum_short / count_short if count_short > 0 else np.nan
+            long_ma[i] = sum_long / count_long if count_long > 0 else np.nan
+            
+            if i > 0:
+                if short_ma[i] > long_ma[i] and short_ma[i - 1] < long_ma[i - 1]:
+                    crossover[i] = 1
+                elif short_ma[i] < long_ma[i] and short_ma[i - 1] > long_ma[i - 1]:
+                    crossover[i] = -1
+        
+        return short_ma, long_ma, crossover
+    
+    return moving_averages_and_crossovers
+
+@lru_cache(maxsize=16)
+def get_kernel(short_window: int, long_window: int):
+    """Get the moving-average kernel specialized for one pair of window sizes.
+    
+    Each pair is compiled once per process and shared by every strategy using it.
+    """
+    return _make_kernel(short_window, long_window)
+
+@njit(cache=True)
+def position_size(cash, price, risk_per_trade):
+    """Shares to buy: risk_per_trade of cash, at least one share, never more than cash covers."""
+    if price <= 0 or cash <= 0:
+        return 0
+    
+    risk_shares = int(cash * risk_per_trade / price)
+    max_shares = int(cash / price)
+    shares = max(1, min(risk_shares, max_shares))
+    if shares * price > cash:
+        shares = max_shares
+    return shares
+
+@njit(cache=True)
+def replay_trades(prices, signals, initial_cash, risk_per_trade):
+    """Replay buy/sell signals over a price series as a single cash-and-shares state machine.
+    
+    Buys size the position with position_size, sells close the whole position.
+    Returns the portfolio value after every bar; the bar index, type (1 buy,
+    -1 sell) and quantity of each trade; and the cash and shares held at the end.
+    """
+    n = prices.shape[0]
+    portfolio_values = np.empty(n, dtype=np.float64)
+    trade_indices = np.empty(n, dtype=np.int64)
+    trade_types = np.empty(n, dtype=np.int8)
+    trade_quantities = np.empty(n, dtype=np.int64)
+    trade_count = 0
+    
+    cash = initial_cash
+    shares_held = 0
+    
+    for i in range(n):
+        price = prices[i]
+        signal = signals[i]
+        
+        if signal == 1 and cash >= price:
+            shares = position_size(cash, price, risk_per_trade)
+            if shares > 0:
+                cash -= shares * price
+                shares_held += shares
+                trade_indices[trade_count] = i
+                trade_types[trade_count] = 1
+                trade_quantities[trade_count] = shares
+                trade_count += 1
+        elif signal == -1 and shares_held > 0:
+            cash += shares_held * price
+            trade_indices[trade_count] = i
+            trade_types[trade_count] = -1
+            trade_quantities[trade_count] = shares_held
+            trade_count += 1
+            shares_held = 0
+        
+        portfolio_values[i] = cash + shares_held * price
+    
+    return (portfolio_values, trade_indices[:trade_count], trade_types[:trade_count],
+            trade_quantities[:trade_count], cash, shares_held)
+
+@njit(cache=True)
+def apply_signals(prices, rsi, crossover, price_momentum, ma_momentum, profit_threshold, stop_loss,
+                  previous_signal, position_open, entry_price):
+    """Sequential buy/sell decision over whole indicator columns, as TradingStrategy._apply_signal.
+    
+    The position state is passed in and returned with the signals so the strategy
+    can carry on from it; an entry price of NaN means there is none.
+    """
+    n = prices.shape[0]
+    signals = np.zeros(n, dtype=np.int64)
+    
+    for i in range(n):
+        price = prices[i]
+        bar_rsi = rsi[i]
+        
+        # Golden cross, or momentum while flat
+        if not (np.isnan(bar_rsi) or np.isnan(price_momentum[i]) or np.isnan(ma_momentum[i])):
+            if previous_signal != 1 and (
+                (crossover[i] == 1 and bar_rsi < 75 and price_momentum[i] > 0) or
+                (bar_rsi < 70 and price_momentum[i] > 0.01 and ma_momentum[i] > 0 and not position_open)
+            ):
+                previous_signal = 1
+                entry_price = price
+                position_open = True
+                signals[i] = 1
+                continue
+        
+        if np.isnan(bar_rsi) or np.isnan(price):
+            continue
+        
+        # Death cross, profit taking or stop loss
+        sell = crossover[i] == -1 and bar_rsi > 25 and previous_signal != -1
+        if not sell and position_open and entry_price != 0:
+            sell = (price >= entry_price * (1 + profit_threshold) or
+                    price <= entry_price * (1 - stop_loss))
+        if sell:
+            previous_signal = -1
+            position_open = False
+            entry_price = np.nan
+            signals[i] = -1
+    
+    return signals, previous_signal, position_open, entry_price
+
+@njit(cache=True)
+def rsi_ewm(prices, span):
+    """RSI from gains and losses smoothed as pandas ewm(span=span, adjust=False).mean().
+    
+    Both averages are updated in the same pass. A change from or to a NaN price
+    counts as neither gain nor loss, as with delta.where() on the price diff.
+    """
+    n = prices.shape[0]
+    avg_gains = np.empty(n, dtype=np.float64)
+    avg_losses = np.empty(n, dtype=np.float64)
+    alpha = 2.0 / (span + 1.0)
+    old_wt = 1.0 - alpha
+    
+    avg_gain = 0.0
+    avg_loss = -0.0
+    for i in range(n):
+        gain = 0.0
+        loss = -0.0
+        if i > 0:
+            delta = prices[i] - prices[i - 1]
+            if delta > 0:
+                gain = delta
+            elif delta < 0:
+                loss = -delta
+        
+        # Same update order as pandas, which leaves the average untouched when it equals the new value
+        if i == 0:
+            avg_gain = gain
+            avg_loss = loss
+        else:
+            if avg_gain != gain:
+                avg_gain = (old_wt * avg_gain + alpha * gain) / (old_wt + alpha)
+            if avg_loss != loss:
+                avg_loss = (old_wt * avg_loss + alpha * loss) / (old_wt + alpha)
+        avg_gains[i] = avg_gain
+        avg_losses[i] = avg_loss
+    
+    rs = avg_gains / avg_losses
+    return 100 - (100 / (1 + rs))
+
+if NUMBA_AVAILABLE:
+    # Compile (or load from the on-disk cache) at import rather than on the first simulator run
+    replay_trades(np.ones(1), np.zeros(1, dtype=np.int64), 1.0, 0.02)
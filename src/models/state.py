@@ -1,9 +1,29 @@
 import threading
+from time import monotonic
+import uuid
+from array import array
+from collections import OrderedDict, deque
+import orjson
 import pandas as pd
-from typing import List, Dict, Any, Optional
+from typing import Deque, List, Dict, Any, Optional, Tuple
 from datetime import datetime
 import logging
 
+# Compact codes for the trade type column
+TRADE_TYPE_CODES = {'buy': 1, 'sell': -1}
+TRADE_TYPE_NAMES = {code: name for name, code in TRADE_TYPE_CODES.items()}
+
+# Most recent trades kept in the history; older ones still count toward the totals
+MAX_TRADES = 5000
+
+# Most recent portfolio values kept for the chart
+MAX_PORTFOLIO_VALUES = 100
+
+# Frames are stored and handed out as shallow copies: each holder gets its own frame object, and
+# pandas copy-on-write copies the data only if one of them modifies it. The state relies on it,
+# so it turns it on itself rather than counting on src.core being imported first
+pd.set_option("mode.copy_on_write", True)
+
 class SimulatorState:
     """Thread-safe state management for the trading simulator."""
     
@@ -11,75 +31,245 @@ class SimulatorState:
         self._lock = threading.RLock()
         self._current_data = pd.DataFrame()
         self._current_signals = pd.DataFrame()
-        self._portfolio_values: List[float] = []
-        self._trades_list: List[Dict[str, Any]] = []
+        # Bounded history: appending past MAX_PORTFOLIO_VALUES evicts the oldest in O(1)
+        self._portfolio_values: Deque[float] = deque(maxlen=MAX_PORTFOLIO_VALUES)
+        self._portfolio_timestamps: Deque[str] = deque(maxlen=MAX_PORTFOLIO_VALUES)
+        # Trades stored column-wise; dicts are only rebuilt when the list is read
+        self._trade_times: List[str] = []
+        self._trade_symbols: List[str] = []
+        self._trade_types = array('b')  # 1 = buy, -1 = sell
+        self._trade_prices = array('d')
+        self._trade_quantities = array('q')
+        # Running buy/sell totals by type code, including trades no longer kept
+        self._trade_type_counts = dict.fromkeys(TRADE_TYPE_NAMES, 0)
+        # FIFO lot matching, updated as trades arrive: unmatched buys as [price, quantity], and running
+        # totals over every buy lot (or part of one) closed by a sell, so they stay constant in size
+        self._open_lots: Deque[List[float]] = deque()
+        self._closed_lots = 0
+        self._winning_lots = 0
+        self._lot_return_sum = 0.0
+        # Encoded JSON of each recorded trade, filled in lazily by get_trades_json
+        self._trades_json: List[bytes] = []
         self._is_simulator_running = False
+        # Set when the current run should stop; each run gets a fresh event
+        self._stop_event = threading.Event()
+        self._stop_event.set()
         self._simulator_thread: Optional[threading.Thread] = None
         self._global_initial_cash = 5000.0
         self._current_symbol = "AAPL"
         self._current_interval = "1m"
         self._current_period = "1d"
+        # Bumped on every change so readers can tell whether anything moved since their last look
+        self._version = 0
         self._logger = logging.getLogger(__name__)
     
+    @property
+    def version(self) -> int:
+        """Get a counter that changes whenever the simulator state changes."""
+        with self._lock:
+            return self._version
+    
     @property
     def current_data(self) -> pd.DataFrame:
         """Get current stock data."""
         with self._lock:
-            return self._current_data.copy()
+            return self._current_data.copy(deep=False)
     
     @current_data.setter
     def current_data(self, data: pd.DataFrame):
         """Set current stock data."""
         with self._lock:
-            self._current_data = data.copy() if not data.empty else pd.DataFrame()
+            self._current_data = data.copy(deep=False) if not data.empty else pd.DataFrame()
+            self._version += 1
     
     @property
     def current_signals(self) -> pd.DataFrame:
         """Get current trading signals."""
         with self._lock:
-            return self._current_signals.copy()
+            return self._current_signals.copy(deep=False)
     
     @current_signals.setter
     def current_signals(self, signals: pd.DataFrame):
         """Set current trading signals."""
         with self._lock:
-            self._current_signals = signals.copy() if not signals.empty else pd.DataFrame()
+            self._current_signals = signals.copy(deep=False) if not signals.empty else pd.DataFrame()
+            self._version += 1
+    
+    def set_market_data(self, data: pd.DataFrame, signals: pd.DataFrame):
+        """Publish stock data and its signals together so readers never see a mismatched pair."""
+        data = data.copy(deep=False) if not data.empty else pd.DataFrame()
+        signals = signals.copy(deep=False) if not signals.empty else pd.DataFrame()
+        with self._lock:
+            self._current_data = data
+            self._current_signals = signals
+            self._version += 1
+    
+    def publish_results(self, data: pd.DataFrame, signals: pd.DataFrame, trades: List[Dict[str, Any]],
+                        values: List[float], timestamps: List[str]):
+        """Publish market data with the trades and portfolio values it produced as a single change.
+        
+        Readers see all of it or none of it, and version-keyed caches are invalidated once.
+        """
+        data = data.copy(deep=False) if not data.empty else pd.DataFrame()
+        signals = signals.copy(deep=False) if not signals.empty else pd.DataFrame()
+        with self._lock:
+            self._current_data = data
+            self._current_signals = signals
+            for trade in trades:
+                self._record_trade(trade)
+            self._trim_trades()
+            self._portfolio_values.extend(values)
+            self._portfolio_timestamps.extend(timestamps)
+            self._version += 1
+    
+    def get_market_data(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Get a consistent (data, signals) snapshot.
+        
+        Both are shallow copies, so modifying them never reaches the stored frames.
+        """
+        with self._lock:
+            return self._current_data.copy(deep=False), self._current_signals.copy(deep=False)
     
     @property
     def portfolio_values(self) -> List[float]:
         """Get portfolio value history."""
         with self._lock:
-            return self._portfolio_values.copy()
+            return list(self._portfolio_values)
+    
+    def get_portfolio_history(self) -> Tuple[List[str], List[float]]:
+        """Get portfolio timestamps and values as matching lists."""
+        with self._lock:
+            return list(self._portfolio_timestamps), list(self._portfolio_values)
     
-    def add_portfolio_value(self, value: float):
-        """Add a new portfolio value."""
+    def add_portfolio_value(self, value: float, timestamp: Optional[str] = None):
+        """Add a new portfolio value, stamped with the current time unless a timestamp is given."""
+        if timestamp is None:
+            timestamp = datetime.now().replace(microsecond=0).isoformat()
         with self._lock:
             self._portfolio_values.append(value)
-            # Keep only the last 100 values to prevent memory issues
-            if len(self._portfolio_values) > 100:
-                self._portfolio_values.pop(0)
+            self._portfolio_timestamps.append(timestamp)
+            self._version += 1
     
     def clear_portfolio_values(self):
         """Clear portfolio value history."""
         with self._lock:
             self._portfolio_values.clear()
+            self._portfolio_timestamps.clear()
+            self._version += 1
     
     @property
     def trades_list(self) -> List[Dict[str, Any]]:
         """Get trade history."""
         with self._lock:
-            return self._trades_list.copy()
+            return [
+                {
+                    "time": time,
+                    "symbol": symbol,
+                    "type": TRADE_TYPE_NAMES[trade_type],
+                    "price": price,
+                    "quantity": quantity
+                }
+                for time, symbol, trade_type, price, quantity in zip(
+                    self._trade_times, self._trade_symbols, self._trade_types,
+                    self._trade_prices, self._trade_quantities
+                )
+            ]
+    
+    def get_trades_json(self) -> bytes:
+        """Get trade history as a JSON array, encoding each trade only once."""
+        with self._lock:
+            # Trades are only appended or dropped from the front, so only the newest can lack an encoding
+            for i in range(len(self._trades_json), len(self._trade_types)):
+                self._trades_json.append(orjson.dumps({
+                    "time": self._trade_times[i],
+                    "symbol": self._trade_symbols[i],
+                    "type": TRADE_TYPE_NAMES[self._trade_types[i]],
+                    "price": self._trade_prices[i],
+                    "quantity": self._trade_quantities[i]
+                }))
+            return b'[' + b','.join(self._trades_json) + b']'
+    
+    @property
+    def trade_count(self) -> int:
+        """Get the number of trades recorded since the last clear, including those no longer kept."""
+        with self._lock:
+            return sum(self._trade_type_counts.values())
+    
+    def get_trade_type_counts(self) -> Tuple[int, int]:
+        """Get (buy_count, sell_count) since the last clear, including trades no longer kept."""
+        with self._lock:
+            return self._trade_type_counts[TRADE_TYPE_CODES['buy']], self._trade_type_counts[TRADE_TYPE_CODES['sell']]
+    
+    def _record_trade(self, trade: Dict[str, Any]):
+        """Append a trade to the trade columns. Caller holds the lock."""
+        if trade['type'] not in TRADE_TYPE_CODES:
+            raise ValueError("Trade type must be 'buy' or 'sell'")
+        
+        self._trade_times.append(trade['time'])
+        self._trade_symbols.append(trade['symbol'])
+        trade_type = TRADE_TYPE_CODES[trade['type']]
+        self._trade_types.append(trade_type)
+        self._trade_prices.append(float(trade['price']))
+        self._trade_quantities.append(int(trade['quantity']))
+        self._trade_type_counts[trade_type] += 1
+        self._match_lots(trade['type'], float(trade['price']), int(trade['quantity']))
+    
+    def _match_lots(self, trade_type: str, price: float, quantity: int):
+        """Open a lot for a buy, or close the oldest open lots for a sell. Caller holds the lock."""
+        if trade_type == 'buy':
+            self._open_lots.append([price, quantity])
+            return
+        
+        while quantity > 0 and self._open_lots:
+            lot = self._open_lots[0]
+            taken = min(quantity, lot[1])
+            if lot[0] > 0:
+                lot_return = (price - lot[0]) / lot[0] * 100
+                self._closed_lots += 1
+                self._winning_lots += lot_return > 0
+                self._lot_return_sum += lot_return
+            quantity -= taken
+            lot[1] -= taken
+            if lot[1] == 0:
+                self._open_lots.popleft()
+    
+    def _trim_trades(self):
+        """Drop the oldest trades beyond MAX_TRADES. Caller holds the lock."""
+        excess = len(self._trade_types) - MAX_TRADES
+        if excess > 0:
+            del self._trade_times[:excess], self._trade_symbols[:excess]
+            del self._trade_types[:excess], self._trade_prices[:excess], self._trade_quantities[:excess]
+            del self._trades_json[:excess]
     
     def add_trade(self, trade: Dict[str, Any]):
         """Add a new trade."""
         with self._lock:
-            self._trades_list.append(trade.copy())
+            self._record_trade(trade)
+            self._trim_trades()
+            self._version += 1
             self._logger.info(f"Added trade: {trade}")
     
+    def get_closed_lot_stats(self) -> Tuple[int, int, float]:
+        """Get (closed_lots, winning_lots, sum of their percentage returns) since the last clear."""
+        with self._lock:
+            return self._closed_lots, self._winning_lots, self._lot_return_sum
+    
+    def _clear_trade_columns(self):
+        """Empty every trade column. Caller holds the lock."""
+        del self._trade_times[:], self._trade_symbols[:]
+        del self._trade_types[:], self._trade_prices[:], self._trade_quantities[:]
+        self._trade_type_counts = dict.fromkeys(TRADE_TYPE_NAMES, 0)
+        self._open_lots.clear()
+        self._closed_lots = 0
+        self._winning_lots = 0
+        self._lot_return_sum = 0.0
+        del self._trades_json[:]
+    
     def clear_trades(self):
         """Clear trade history."""
         with self._lock:
-            self._trades_list.clear()
+            self._clear_trade_columns()
+            self._version += 1
             self._logger.info("Cleared all trades")
     
     @property
@@ -93,8 +283,19 @@ class SimulatorState:
         """Set simulator running state."""
         with self._lock:
             self._is_simulator_running = running
+            self._version += 1
+            if running:
+                self._stop_event = threading.Event()
+            else:
+                self._stop_event.set()
             self._logger.info(f"Simulator running state changed to: {running}")
     
+    @property
+    def stop_event(self) -> threading.Event:
+        """Get the stop event of the current run, set once that run is stopped."""
+        with self._lock:
+            return self._stop_event
+    
     @property
     def simulator_thread(self) -> Optional[threading.Thread]:
         """Get simulator thread."""
@@ -118,6 +319,7 @@ class SimulatorState:
         """Set initial cash amount."""
         with self._lock:
             self._global_initial_cash = cash
+            self._version += 1
             self._logger.info(f"Initial cash set to: ${cash}")
     
     @property
@@ -131,6 +333,7 @@ class SimulatorState:
         """Set current trading symbol."""
         with self._lock:
             self._current_symbol = symbol
+            self._version += 1
             self._logger.info(f"Trading symbol changed to: {symbol}")
     
     @property
@@ -144,6 +347,7 @@ class SimulatorState:
         """Set current data interval."""
         with self._lock:
             self._current_interval = interval
+            self._version += 1
             self._logger.info(f"Data interval changed to: {interval}")
     
     @property
@@ -157,6 +361,7 @@ class SimulatorState:
         """Set current data period."""
         with self._lock:
             self._current_period = period
+            self._version += 1
             self._logger.info(f"Data period changed to: {period}")
     
     def reset_state(self):
@@ -165,13 +370,16 @@ class SimulatorState:
             self._current_data = pd.DataFrame()
             self._current_signals = pd.DataFrame()
             self._portfolio_values.clear()
-            self._trades_list.clear()
+            self._portfolio_timestamps.clear()
+            self._clear_trade_columns()
             self._is_simulator_running = False
+            self._stop_event.set()
             self._simulator_thread = None
             self._global_initial_cash = 5000.0
             self._current_symbol = "AAPL"
             self._current_interval = "1m"
             self._current_period = "1d"
+            self._version += 1
             self._logger.info("Simulator state reset")
     
     def get_state_summary(self) -> Dict[str, Any]:
@@ -186,7 +394,7 @@ class SimulatorState:
                 'data_points': len(self._current_data),
                 'signals_count': len(self._current_signals),
                 'portfolio_values_count': len(self._portfolio_values),
-                'trades_count': len(self._trades_list),
+                'trades_count': sum(self._trade_type_counts.values()),
                 'current_portfolio_value': self._portfolio_values[-1] if self._portfolio_values else self._global_initial_cash
             }
 
@@ -197,3 +405,62 @@ def get_simulator_state() -> SimulatorState:
     """Get the global simulator state instance."""
     return simulator_state
 
+
+logger = logging.getLogger(__name__)
+
+# Additional simulator sessions by id; requests without a session id use the global instance
+_sessions: "OrderedDict[str, SimulatorState]" = OrderedDict()  # least recently used first
+_session_last_used: Dict[str, float] = {}
+_sessions_lock = threading.Lock()
+
+# Sessions beyond the cap evict the least recently used one; sessions idle this long are dropped
+MAX_SESSIONS = 16
+SESSION_IDLE_SECONDS = 30 * 60
+
+def _drop_session(session_id: str) -> SimulatorState:
+    """Remove a session and stop its simulator; the caller holds the sessions lock."""
+    state = _sessions.pop(session_id)
+    _session_last_used.pop(session_id, None)
+    if state.is_simulator_running:
+        state.is_simulator_running = False
+    return state
+
+def _expire_sessions(now: float) -> None:
+    """Drop idle sessions, then the least recently used ones while the cap is reached."""
+    for session_id in [sid for sid, used in _session_last_used.items() if now - used > SESSION_IDLE_SECONDS]:
+        _drop_session(session_id)
+        logger.info(f"Session {session_id} expired after being idle")
+    while len(_sessions) >= MAX_SESSIONS:
+        session_id = next(iter(_sessions))
+        _drop_session(session_id)
+        logger.info(f"Session {session_id} evicted to stay within {MAX_SESSIONS} sessions")
+
+def create_session() -> Tuple[str, SimulatorState]:
+    """Create an independent simulator session and return its id with its state."""
+    session_id = uuid.uuid4().hex
+    state = SimulatorState()
+    now = monotonic()
+    with _sessions_lock:
+        _expire_sessions(now)
+        _sessions[session_id] = state
+        _session_last_used[session_id] = now
+    return session_id, state
+
+def get_session(session_id: Optional[str] = None) -> Optional[SimulatorState]:
+    """Get the state of a simulator session, the global one if no id is given, or None if unknown."""
+    if not session_id:
+        return simulator_state
+    with _sessions_lock:
+        state = _sessions.get(session_id)
+        if state is not None:
+            _sessions.move_to_end(session_id)
+            _session_last_used[session_id] = monotonic()
+        return state
+
+def delete_session(session_id: str) -> bool:
+    """Stop and remove a simulator session; False if the id is unknown."""
+    with _sessions_lock:
+        if session_id not in _sessions:
+            return False
+        _drop_session(session_id)
+    return True
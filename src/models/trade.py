@@ -6,6 +6,9 @@ from typing import Optional
 class Trade:
     """Represents a single trade in the simulator."""
     
+    # Declared by hand rather than with dataclass(slots=True), which needs Python 3.10
+    __slots__ = ('time', 'symbol', 'type', 'price', 'quantity')
+    
     time: datetime
     symbol: str
     type: str  # 'buy' or 'sell'
@@ -49,6 +52,8 @@ class Trade:
 class PortfolioSnapshot:
     """Represents a portfolio snapshot at a point in time."""
     
+    __slots__ = ('timestamp', 'cash', 'shares_held', 'share_price', 'total_value')
+    
     timestamp: datetime
     cash: float
     shares_held: int
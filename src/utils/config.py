@@ -1,7 +1,11 @@
 import os
+import atexit
+import queue
 import logging
+from logging.handlers import QueueHandler, QueueListener
 from typing import Dict, Any, Optional
 from dataclasses import dataclass
+from functools import lru_cache
 
 @dataclass
 class TradingConfig:
@@ -21,6 +25,7 @@ class TradingConfig:
     max_portfolio_values: int = 100
     simulation_sleep_time: int = 10
     historical_sleep_time: float = 0.5
+    data_cache_dir: Optional[str] = ".cache"
 
 @dataclass
 class FlaskConfig:
@@ -67,6 +72,7 @@ class Config:
         self.trading.default_stop_loss = float(os.environ.get('DEFAULT_STOP_LOSS', self.trading.default_stop_loss))
         self.trading.max_retries = int(os.environ.get('MAX_RETRIES', self.trading.max_retries))
         self.trading.retry_delay = int(os.environ.get('RETRY_DELAY', self.trading.retry_delay))
+        self.trading.data_cache_dir = os.environ.get('DATA_CACHE_DIR', self.trading.data_cache_dir) or None
         
         # Logging Configuration
         self.logging.level = os.environ.get('LOG_LEVEL', self.logging.level)
@@ -82,10 +88,21 @@ class Config:
             except Exception as e:
                 logging.warning(f"Could not setup file logging: {e}")
         
+        formatter = logging.Formatter(self.logging.format)
+        for handler in handlers:
+            handler.setFormatter(formatter)
+        
+        # Callers only enqueue records; a background listener does the formatting and stream I/O
+        log_queue = queue.SimpleQueue()
+        self._log_listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        self._log_listener.start()
+        atexit.register(self._log_listener.stop)
+        
+        # The queue handler only merges args into the message; the full format is applied by the listener
         logging.basicConfig(
             level=getattr(logging, self.logging.level.upper()),
-            format=self.logging.format,
-            handlers=handlers
+            format="%(message)s",
+            handlers=[QueueHandler(log_queue)]
         )
     
     def validate(self) -> bool:
@@ -136,20 +153,20 @@ class Config:
             'risk_per_trade': self.trading.risk_per_trade,
             'max_portfolio_values': self.trading.max_portfolio_values,
             'simulation_sleep_time': self.trading.simulation_sleep_time,
-            'historical_sleep_time': self.trading.historical_sleep_time
+            'historical_sleep_time': self.trading.historical_sleep_time,
+            'data_cache_dir': self.trading.data_cache_dir
         }
     
     def get_flask_config(self) -> Dict[str, Any]:
         """Get Flask configuration as dictionary."""
         return {
             'DEBUG': self.flask.debug,
+            'TEMPLATES_AUTO_RELOAD': self.flask.debug,
             'SECRET_KEY': self.flask.secret_key,
             'MAX_CONTENT_LENGTH': self.flask.max_content_length
         }
 
-# Global configuration instance
-config = Config()
-
+@lru_cache(maxsize=1)
 def get_config() -> Config:
-    """Get the global configuration instance."""
-    return config 
\ No newline at end of file
+    """Get the global configuration instance, parsed from the environment on first use."""
+    return Config()
@@ -0,0 +1,46 @@
+import decimal
+import orjson
+import numpy as np
+from typing import Any, Union
+from flask.json.provider import JSONProvider
+
+def _default(obj: Any) -> Any:
+    """Serialize types orjson does not handle natively."""
+    if hasattr(obj, 'isoformat'):  # pandas Timestamp and other datetime-likes
+        return obj.isoformat()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+class ORJSONProvider(JSONProvider):
+    """Flask JSON provider backed by orjson.
+    
+    NumPy arrays and scalars are serialized directly, and NaN is written as
+    null, so handlers can return float arrays without converting them first.
+    """
+    
+    option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        """Serialize data as a JSON string."""
+        return orjson.dumps(obj, default=_default, option=self.option).decode('utf-8')
+    
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        """Deserialize data from a JSON string or bytes."""
+        return orjson.loads(s)
+    
+    def response(self, *args: Any, **kwargs: Any):
+        """Serialize the given arguments into a JSON response without a bytes round trip."""
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=_default, option=self.option),
+            mimetype='application/json'
+        )
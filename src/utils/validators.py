@@ -21,14 +21,14 @@ class InputValidator:
     # Valid periods
     VALID_PERIODS = ['1d', '5d', '1mo', '3mo', '6mo', '1y', '2y', '5y', '10y', 'ytd', 'max']
     
-    # Available stocks for validation
-    AVAILABLE_STOCKS = [
+    # Available stocks for validation, as a set for constant-time membership checks
+    AVAILABLE_STOCKS = frozenset((
         'AAPL', 'MSFT', 'GOOGL', 'AMZN', 'TSLA', 'META', 'NVDA', 'NFLX',
         'AMD', 'INTC', 'CRM', 'ORCL', 'ADBE', 'PYPL', 'UBER', 'LYFT',
         'SPOT', 'ZM', 'SQ', 'SHOP', 'ROKU', 'PINS', 'SNAP', 'TWTR',
         'JPM', 'BAC', 'WFC', 'GS', 'MS', 'C', 'JNJ', 'PFE', 'UNH',
         'HD', 'DIS', 'V', 'MA', 'PG', 'KO', 'PEP', 'WMT', 'COST'
-    ]
+    ))
     
     @classmethod
     def validate_symbol(cls, symbol: str) -> str:
@@ -0,0 +1,226 @@
+import unittest
+import threading
+import numpy as np
+import pandas as pd
+import sys
+import os
+from unittest.mock import MagicMock, patch
+
+# Add the project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app
+from src.api import routes
+from src.models import state as state_module
+from src.models.state import create_session, delete_session, get_session
+
+class TestSimulatorSessions(unittest.TestCase):
+    """Test cases for the simulator sessions of the API."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.client = create_app().test_client()
+        self.session_ids = []
+    
+    def tearDown(self):
+        """Remove the sessions a test created."""
+        for session_id in self.session_ids:
+            delete_session(session_id)
+    
+    def new_session(self):
+        """Create a session that is removed again after the test."""
+        session_id, state = create_session()
+        self.session_ids.append(session_id)
+        return session_id, state
+    
+    def status(self, session_id=None):
+        """Get the simulator status of a session."""
+        query = f"?session_id={session_id}" if session_id else ""
+        return self.client.get(f"/api/simulator-status{query}")
+    
+    def test_sessions_are_isolated(self):
+        """Test that a session's state is not seen by other sessions or the default one."""
+        first_id, first = self.new_session()
+        second_id, second = self.new_session()
+        first.global_initial_cash = 5000.0
+        second.global_initial_cash = 5000.0
+        
+        # Prime the response caches before the first session changes
+        default_value = self.status().get_json()["current_portfolio_value"]
+        self.assertEqual(self.status(second_id).get_json()["current_portfolio_value"], 5000.0)
+        
+        first.add_portfolio_value(7000.0)
+        
+        self.assertEqual(self.status(first_id).get_json()["current_portfolio_value"], 7000.0)
+        self.assertEqual(self.status(second_id).get_json()["current_portfolio_value"], 5000.0)
+        self.assertEqual(self.status().get_json()["current_portfolio_value"], default_value)
+    
+    def test_unknown_session_is_rejected(self):
+        """Test that an unknown session id gets a 404."""
+        response = self.status("no-such-session")
+        
+        self.assertEqual(response.status_code, 404)
+        self.assertIn("Unknown session", response.get_json()["error"])
+    
+    def test_delete_session(self):
+        """Test that a removed session is stopped and no longer served."""
+        session_id, state = self.new_session()
+        state.is_simulator_running = True
+        self.assertEqual(self.status(session_id).status_code, 200)
+        
+        response = self.client.delete(f"/api/sessions/{session_id}")
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(state.is_simulator_running)
+        self.assertTrue(state.stop_event.is_set())
+        self.assertIsNone(get_session(session_id))
+        self.assertEqual(self.status(session_id).status_code, 404)
+        self.assertEqual(self.client.delete(f"/api/sessions/{session_id}").status_code, 404)
+    
+    def test_performance_metrics_from_closed_lots(self):
+        """Test that win rate and average trade return come from FIFO-matched lots."""
+        session_id, state = self.new_session()
+        state.global_initial_cash = 5000.0
+        for trade_type, price, quantity in [("buy", 100.0, 10), ("buy", 110.0, 10), ("sell", 121.0, 15),
+                                            ("sell", 99.0, 5), ("sell", 50.0, 3)]:
+            state.add_trade({"time": "2024-01-01T09:30:00", "symbol": "AAPL", "type": trade_type,
+                             "price": price, "quantity": quantity})
+        state.add_portfolio_value(5000.0)
+        state.add_portfolio_value(5160.0)
+        
+        metrics = self.client.get(f"/api/performance-metrics?session_id={session_id}").get_json()
+        
+        # Lots close at +21%, +10% and -10%; the last sell finds no open lot
+        self.assertEqual((metrics["buy_trades"], metrics["sell_trades"]), (2, 3))
+        self.assertEqual(metrics["profitable_trades"], 2)
+        self.assertAlmostEqual(metrics["win_rate"], 200 / 3)
+        self.assertAlmostEqual(metrics["avg_trade_return"], 7.0)
+    
+    def test_error_fallback_is_not_cached(self):
+        """Test that a fallback response is rebuilt on the next poll instead of being served from the cache."""
+        session_id, state = self.new_session()
+        state.add_portfolio_value(5000.0)
+        state.add_portfolio_value(5100.0)
+        url = f"/api/performance-metrics?session_id={session_id}"
+        
+        with patch.object(state, 'get_closed_lot_stats', side_effect=RuntimeError("boom")):
+            fallback = self.client.get(url)
+        recovered = self.client.get(url)
+        
+        self.assertEqual(fallback.get_json()["error"], "boom")
+        self.assertTrue(fallback.cache_control.no_store)
+        self.assertNotIn("error", recovered.get_json())
+    
+    def test_sessions_are_capped(self):
+        """Test that the least recently used session makes room once the cap is reached."""
+        session_ids = [self.new_session()[0] for _ in range(state_module.MAX_SESSIONS)]
+        
+        # Using the oldest session keeps it; the next oldest is evicted instead
+        get_session(session_ids[0])
+        self.new_session()
+        
+        self.assertIsNotNone(get_session(session_ids[0]))
+        self.assertIsNone(get_session(session_ids[1]))
+        self.assertLessEqual(len(state_module._sessions), state_module.MAX_SESSIONS)
+    
+    def test_idle_sessions_expire(self):
+        """Test that sessions idle past the timeout are dropped when a new one is created."""
+        session_id, _ = self.new_session()
+        state_module._session_last_used[session_id] -= state_module.SESSION_IDLE_SECONDS + 1
+        
+        self.new_session()
+        
+        self.assertIsNone(get_session(session_id))
+
+class TestStockDataBootstrap(unittest.TestCase):
+    """Test cases for the initial data fetched by /stock-data."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.client = create_app().test_client()
+        self.session_id, self.state = create_session()
+        closes = 100 + np.arange(30.0)
+        self.data = pd.DataFrame({'Open': closes, 'High': closes, 'Low': closes, 'Close': closes, 'Volume': 1000.0},
+                                 index=pd.date_range('2024-01-01 09:30', periods=30, freq='1min'))
+    
+    def tearDown(self):
+        """Remove the test session."""
+        delete_session(self.session_id)
+    
+    def test_bootstrap_response_revalidates(self):
+        """Test that the ETag of a bootstrapped response is still valid on the next poll."""
+        fetcher = MagicMock()
+        fetcher.get_real_time_data.return_value = self.data
+        url = f"/api/stock-data?session_id={self.session_id}"
+        
+        with patch.object(routes, 'get_bootstrap_fetcher', return_value=fetcher):
+            first = self.client.get(url)
+            second = self.client.get(url, headers={'If-None-Match': first.headers['ETag']})
+        
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.get_json()["data_points"], 30)
+        self.assertEqual(second.status_code, 304)
+        fetcher.get_real_time_data.assert_called_once()
+
+class ImmediateEvent(threading.Event):
+    """Stop event whose waits return at once, so the polling loop runs without sleeping."""
+    
+    def wait(self, timeout=None):
+        return self.is_set()
+
+class TestRealTimePolling(unittest.TestCase):
+    """Test cases for the real-time polling loop of the simulator."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.client = create_app().test_client()
+        self.session_id, self.state = create_session()
+        rng = np.random.default_rng(3)
+        closes = 100 + np.cumsum(rng.normal(0, 0.5, 61))
+        self.data = pd.DataFrame({'Open': closes, 'High': closes, 'Low': closes, 'Close': closes, 'Volume': 1000.0},
+                                 index=pd.date_range('2024-01-01 09:30', periods=61, freq='1min'))
+    
+    def tearDown(self):
+        """Remove the test session."""
+        delete_session(self.session_id)
+    
+    def test_idle_polls_keep_etag(self):
+        """Test that polls without new bars leave the ETag valid, and a revised last bar replaces it."""
+        revised = self.data.copy()
+        revised.iloc[-1, revised.columns.get_loc('Close')] += 1.0
+        # What each poll returns: the history, one live bar, idle polls, then a revision of that bar
+        polls = [
+            (self.data.iloc[:60], self.data.iloc[:60]),
+            (self.data.iloc[60:], self.data),
+            (self.data.iloc[:0], self.data),
+            (self.data.iloc[:0], self.data),
+            (self.data.iloc[:0], revised),
+        ]
+        responses = []
+        test = self
+        
+        class FakeFetcher:
+            def __init__(self, **kwargs):
+                self.last_data = pd.DataFrame()
+            
+            def get_new_bars(self):
+                # Poll the API as a client would between fetches, once the live bar is published
+                if len(polls) <= 3:
+                    headers = {'If-None-Match': responses[0].headers['ETag']} if responses else {}
+                    responses.append(test.client.get(f"/api/stock-data?session_id={test.session_id}", headers=headers))
+                if not polls:
+                    test.state.is_simulator_running = False
+                    return pd.DataFrame()
+                new_bars, self.last_data = polls.pop(0)
+                return new_bars
+        
+        self.state.is_simulator_running = True
+        self.state._stop_event = ImmediateEvent()
+        with patch.object(routes, 'DataFetcher', FakeFetcher):
+            routes.run_simulator_background(initial_cash=5000, state=self.state)
+        
+        self.assertEqual(responses[0].status_code, 200)
+        self.assertEqual([response.status_code for response in responses[1:]], [304, 304, 200])
+
+if __name__ == '__main__':
+    unittest.main()
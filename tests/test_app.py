@@ -0,0 +1,45 @@
+import unittest
+import sys
+import os
+
+# Add the project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app, precompile_pages
+
+class TestDashboardPage(unittest.TestCase):
+    """Test cases for the precompiled dashboard page."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        app = create_app()
+        # Debug configurations render live; serve the precompiled pages as in production
+        precompile_pages(app)
+        self.client = app.test_client()
+    
+    def test_index_revalidates_with_etag(self):
+        """Test that the index page carries an ETag and answers a matching If-None-Match with a 304."""
+        for encoding in ('gzip', 'identity'):
+            headers = {'Accept-Encoding': encoding}
+            first = self.client.get('/', headers=headers)
+            etag = first.headers['ETag']
+            
+            second = self.client.get('/', headers={**headers, 'If-None-Match': etag})
+            
+            self.assertEqual(first.status_code, 200)
+            self.assertIn('max-age=300', first.headers['Cache-Control'])
+            self.assertEqual(second.status_code, 304)
+            self.assertEqual(second.data, b'')
+            self.assertEqual(second.headers['ETag'], etag)
+    
+    def test_encodings_have_distinct_etags(self):
+        """Test that the gzip and plain bodies are tagged differently."""
+        gzip_etag = self.client.get('/', headers={'Accept-Encoding': 'gzip'}).headers['ETag']
+        plain_etag = self.client.get('/', headers={'Accept-Encoding': 'identity'}).headers['ETag']
+        
+        self.assertNotEqual(gzip_etag, plain_etag)
+        self.assertEqual(self.client.get('/', headers={'Accept-Encoding': 'identity',
+                                                       'If-None-Match': gzip_etag}).status_code, 200)
+
+if __name__ == '__main__':
+    unittest.main()
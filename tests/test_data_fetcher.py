@@ -4,6 +4,7 @@ from unittest.mock import Mock, patch, MagicMock
 from datetime import datetime, timedelta
 import sys
 import os
+import tempfile
 
 # Add src to path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
@@ -115,6 +116,33 @@ class TestDataFetcher(unittest.TestCase):
         cached_result = self.fetcher.get_real_time_data()
         self.assertTrue(result.equals(cached_result))
     
+    @patch('core.data_fetcher.yf.Ticker')
+    def test_ticker_reused_across_fetches(self, mock_ticker):
+        """Test that the yfinance ticker is created once and reused."""
+        mock_stock = Mock()
+        mock_stock.history.return_value = self.mock_data
+        mock_ticker.return_value = mock_stock
+        
+        self.fetcher.get_real_time_data()
+        self.fetcher.clear_cache()
+        self.fetcher.get_real_time_data()
+        
+        mock_ticker.assert_called_once_with("AAPL")
+        self.assertEqual(mock_stock.history.call_count, 2)
+    
+    @patch('core.data_fetcher.yf.Ticker')
+    def test_get_new_bars(self, mock_ticker):
+        """Test that only bars not handed out before are returned."""
+        mock_stock = Mock()
+        mock_stock.history.return_value = self.mock_data
+        mock_ticker.return_value = mock_stock
+        
+        first = self.fetcher.get_new_bars()
+        self.assertEqual(first.index[-1], self.mock_data.index[-1])
+        
+        # Same data again (served from cache) yields nothing new
+        self.assertTrue(self.fetcher.get_new_bars().empty)
+    
     @patch('core.data_fetcher.yf.Ticker')
     def test_get_real_time_data_failure(self, mock_ticker):
         """Test data fetching with failures."""
@@ -151,6 +179,17 @@ class TestDataFetcher(unittest.TestCase):
         price = self.fetcher.get_latest_price()
         self.assertEqual(price, 153.0)
     
+    @patch('core.data_fetcher.yf.Ticker')
+    def test_get_latest_price_from_quote(self, mock_ticker):
+        """Test that the latest price comes from the quote without fetching history."""
+        mock_stock = Mock()
+        mock_stock.fast_info = {'last_price': 155.5}
+        mock_ticker.return_value = mock_stock
+        
+        price = self.fetcher.get_latest_price()
+        self.assertEqual(price, 155.5)
+        mock_stock.history.assert_not_called()
+    
     def test_get_latest_price_with_nan(self):
         """Test getting latest price with NaN values."""
         # Create data with NaN
@@ -234,6 +273,92 @@ class TestDataFetcher(unittest.TestCase):
         expected_key = "AAPL_1m_1d_2024-01-01"
         self.assertEqual(cache_key, expected_key)
     
+    def test_incremental_fetch_merges_new_bars(self):
+        """Test that recent held bars are extended instead of refetched."""
+        recent_index = pd.date_range(end=pd.Timestamp.now().floor('min'), periods=3, freq='1min')
+        self.fetcher._bars = self.mock_data.set_axis(recent_index)
+        
+        # Last bar is re-sent with an updated close, plus one new bar
+        new_bars = pd.DataFrame({
+            'Open': [152.0, 153.0],
+            'High': [155.0, 156.0],
+            'Low': [151.0, 152.0],
+            'Close': [153.5, 154.0],
+            'Volume': [1200000, 1300000]
+        }, index=[recent_index[-1], recent_index[-1] + pd.Timedelta(minutes=1)])
+        mock_stock = Mock()
+        mock_stock.history.return_value = new_bars
+        
+        result = self.fetcher._fetch_current_data(mock_stock, 1)
+        
+        mock_stock.history.assert_called_once_with(start=recent_index[-1], interval="1m")
+        self.assertEqual(len(result), 4)
+        self.assertEqual(result['Close'].iloc[2], 153.5)
+        
+        # No new bars keeps the held data instead of reporting an empty fetch
+        mock_stock.history.return_value = pd.DataFrame()
+        self.assertEqual(len(self.fetcher._fetch_current_data(mock_stock, 1)), 3)
+    
+    def test_add_synthetic_data_points(self):
+        """Test that sparse data gets three interpolated points between bars."""
+        result = self.fetcher._add_synthetic_data_points(self.mock_data)
+        
+        self.assertEqual(len(result), 9)
+        self.assertEqual(result.index[1], self.mock_data.index[0] + pd.Timedelta(seconds=15))
+        self.assertEqual(result['Close'].iloc[2], 151.5)
+        self.assertEqual(result['Volume'].iloc[5], 1125000)
+        self.assertEqual(result['Close'].iloc[-1], 153.0)
+    
+    def test_disk_cache_round_trip(self):
+        """Test that stored bars are reloaded by a new fetcher."""
+        with tempfile.TemporaryDirectory() as cache_dir:
+            fetcher = DataFetcher(symbol="AAPL", interval="1m", period="1d", cache_dir=cache_dir)
+            self.assertTrue(fetcher._bars.empty)
+            
+            fetcher._store_bars(self.mock_data)
+            reloaded = DataFetcher(symbol="AAPL", interval="1m", period="1d", cache_dir=cache_dir)
+            self.assertTrue(reloaded._bars.equals(self.mock_data))
+    
+    def test_historical_disk_cache(self):
+        """Test that bars of a past day are fetched once and then served from disk."""
+        past_date = (datetime.now() - timedelta(days=3)).strftime('%Y-%m-%d')
+        mock_stock = Mock()
+        mock_stock.history.return_value = self.mock_data.set_axis(
+            pd.date_range(past_date, periods=3, freq='1min'))
+        
+        with tempfile.TemporaryDirectory() as cache_dir:
+            fetcher = DataFetcher(symbol="AAPL", interval="1m", period="1d", start_date=past_date,
+                                  cache_dir=cache_dir)
+            first = fetcher._fetch_historical_data(mock_stock, 1)
+            second = fetcher._fetch_historical_data(mock_stock, 1)
+        
+        self.assertEqual(mock_stock.history.call_count, 1)
+        self.assertTrue(first.equals(second))
+    
+    @patch('yfinance.download')
+    def test_fetch_many(self, mock_download):
+        """Test that several fetchers are filled from a single batched download."""
+        mock_download.return_value = pd.concat({'AAPL': self.mock_data, 'MSFT': self.mock_data * 2}, axis=1)
+        fetchers = [DataFetcher(symbol=symbol, interval="1m", period="1d") for symbol in ("AAPL", "MSFT")]
+        
+        results = DataFetcher.fetch_many(fetchers)
+        
+        self.assertEqual(mock_download.call_count, 1)
+        self.assertEqual(mock_download.call_args[0][0], "AAPL MSFT")
+        self.assertEqual(set(results), {"AAPL", "MSFT"})
+        self.assertEqual(fetchers[1].get_real_time_data()['Close'].iloc[-1], 306.0)
+    
+    def test_fetch_all(self):
+        """Test that fetch_all returns each fetcher's data in order."""
+        fetchers = [DataFetcher(symbol=symbol, interval="1m", period="1d") for symbol in ("AAPL", "MSFT")]
+        fetchers[0]._cache_data(self.mock_data)
+        fetchers[1]._cache_data(self.mock_data * 2)
+        
+        results = DataFetcher.fetch_all(fetchers)
+        
+        self.assertTrue(results[0].equals(self.mock_data))
+        self.assertTrue(results[1].equals(self.mock_data * 2))
+    
     def test_future_date_validation(self):
         """Test validation of future dates."""
         future_date = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
@@ -0,0 +1,123 @@
+import unittest
+import pandas as pd
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models.state import SimulatorState
+
+class TestLotMatching(unittest.TestCase):
+    """Test cases for the first-in first-out lot matching of SimulatorState."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.state = SimulatorState()
+    
+    def assert_lot_returns(self, returns):
+        """Check the closed-lot totals against the returns the lots should have closed at."""
+        closed_lots, winning_lots, return_sum = self.state.get_closed_lot_stats()
+        self.assertEqual(closed_lots, len(returns))
+        self.assertEqual(winning_lots, sum(r > 0 for r in returns))
+        self.assertAlmostEqual(return_sum, sum(returns))
+    
+    def trade(self, trade_type, price, quantity):
+        """Record a trade on the test state."""
+        self.state.add_trade({
+            "time": "2024-01-01T09:30:00",
+            "symbol": "AAPL",
+            "type": trade_type,
+            "price": price,
+            "quantity": quantity
+        })
+    
+    def test_stacked_buys_close_oldest_first(self):
+        """Test that a sell closes the oldest open lot before newer ones."""
+        self.trade("buy", 100.0, 10)
+        self.trade("buy", 110.0, 10)
+        self.trade("sell", 121.0, 20)
+        
+        self.assert_lot_returns([21.0, 10.0])
+    
+    def test_partial_lot_close(self):
+        """Test that a partly closed lot stays open for the rest of its shares."""
+        self.trade("buy", 100.0, 10)
+        self.trade("sell", 105.0, 4)
+        self.trade("sell", 95.0, 6)
+        self.trade("sell", 200.0, 1)
+        
+        # The last sell finds the lot used up and closes nothing
+        self.assert_lot_returns([5.0, -5.0])
+    
+    def test_sell_spanning_lots(self):
+        """Test that a sell larger than the oldest lot carries on into the next one."""
+        self.trade("buy", 100.0, 10)
+        self.trade("buy", 110.0, 10)
+        self.trade("sell", 121.0, 15)
+        self.trade("sell", 99.0, 5)
+        
+        self.assert_lot_returns([21.0, 10.0, -10.0])
+    
+    def test_sell_without_open_lots(self):
+        """Test that a sell with no open lots closes nothing and opens no short."""
+        self.trade("sell", 100.0, 5)
+        self.trade("buy", 100.0, 2)
+        self.trade("sell", 110.0, 2)
+        
+        self.assert_lot_returns([10.0])
+        self.assertEqual(self.state.get_trade_type_counts(), (1, 2))
+    
+    def test_clear_trades_drops_open_lots(self):
+        """Test that clearing the trades also forgets open lots and closed returns."""
+        self.trade("buy", 100.0, 10)
+        self.trade("sell", 110.0, 5)
+        self.state.clear_trades()
+        self.trade("sell", 120.0, 5)
+        
+        self.assertEqual(self.state.get_closed_lot_stats(), (0, 0, 0.0))
+
+class TestMarketDataIsolation(unittest.TestCase):
+    """Test that frames handed to or out of SimulatorState never alias the stored ones."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.state = SimulatorState()
+        index = pd.date_range('2024-01-01', periods=5, freq='1min')
+        self.data = pd.DataFrame({'Close': [1.0, 2.0, 3.0, 4.0, 5.0]}, index=index)
+        self.signals = pd.DataFrame({'signal': [0, 1, 0, -1, 0]}, index=index)
+        self.state.set_market_data(self.data, self.signals)
+    
+    def assert_stored_unchanged(self):
+        """Check the stored frames still hold the published values."""
+        data, signals = self.state.get_market_data()
+        self.assertEqual(data['Close'].tolist(), [1.0, 2.0, 3.0, 4.0, 5.0])
+        self.assertEqual(signals['signal'].tolist(), [0, 1, 0, -1, 0])
+        self.assertEqual(list(data.columns), ['Close'])
+    
+    def test_copy_on_write_enabled_by_state(self):
+        """Test that importing the state alone turns on the copy-on-write it relies on."""
+        self.assertTrue(pd.get_option("mode.copy_on_write"))
+    
+    def test_mutating_returned_frames(self):
+        """Test that modifying frames read from the state leaves the stored ones intact."""
+        data, signals = self.state.get_market_data()
+        data.iloc[0, 0] = -1.0
+        data['Close'] *= 2
+        data['Extra'] = 0.0
+        signals.loc[signals.index[1], 'signal'] = 0
+        current = self.state.current_data
+        current.iloc[:, 0] = 0.0
+        
+        self.assert_stored_unchanged()
+    
+    def test_mutating_published_frames(self):
+        """Test that modifying frames after publishing them leaves the stored ones intact."""
+        self.data.iloc[0, 0] = -1.0
+        self.data['Close'] *= 2
+        self.signals.iloc[1, 0] = 0
+        
+        self.assert_stored_unchanged()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import numpy as np
+import pandas as pd
+import sys
+import os
+from unittest.mock import patch
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.strategy import TradingStrategy
+
+INDICATOR_COLUMNS = ["short_ma", "long_ma", "rsi", "volatility", "price_momentum", "ma_momentum"]
+
+class TestTradingStrategy(unittest.TestCase):
+    """Test cases for the TradingStrategy class."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        rng = np.random.default_rng(7)
+        closes = 100 + np.cumsum(rng.normal(0, 0.5, 150))
+        closes[[70, 71, 110]] = np.nan
+        self.data = pd.DataFrame({'Close': closes}, index=pd.date_range('2024-01-01', periods=150, freq='1min'))
+    
+    def test_push_price_matches_recompute_across_nan_bars(self):
+        """Test that live bars scored one at a time match a full recompute, including after NaN closes."""
+        split = 40
+        full = TradingStrategy(profit_threshold=0.015).generate_signals(self.data).signals
+        
+        # Same run as the simulator: a historical pass, then live bars through the running indicators
+        strategy = TradingStrategy(profit_threshold=0.015)
+        strategy.generate_signals(self.data.iloc[:split])
+        strategy.prime_indicators(self.data['Close'].iloc[:split])
+        live = pd.DataFrame(
+            [strategy.push_price(price) for price in self.data['Close'].iloc[split:]],
+            index=self.data.index[split:]
+        )
+        
+        expected = full.iloc[split:]
+        for column in INDICATOR_COLUMNS:
+            np.testing.assert_allclose(live[column], expected[column], rtol=1e-9, err_msg=column)
+        np.testing.assert_array_equal(live["crossover"], expected["crossover"])
+        np.testing.assert_array_equal(live["signal"], expected["signal"])
+        
+        # The NaN bars must not stop the averages or the trading after them
+        self.assertFalse(live[INDICATOR_COLUMNS[:3]].iloc[-20:].isna().any().any())
+        self.assertTrue((live["signal"].iloc[110 - split:] != 0).any())
+    
+    def test_signal_cache_is_shared_across_instances(self):
+        """Test that a new strategy reuses the result another one computed for the same prices and parameters."""
+        data = self.data.dropna() * 1.5  # Prices no other test scores
+        computed = TradingStrategy(profit_threshold=0.015)
+        first = computed.generate_signals(data)
+        
+        with patch.object(TradingStrategy, '_calculate_indicators', autospec=True,
+                          side_effect=TradingStrategy._calculate_indicators) as calculate:
+            strategy = TradingStrategy(profit_threshold=0.015)
+            cached = strategy.generate_signals(data)
+            self.assertEqual(calculate.call_count, 0)
+            
+            # The hit also restores the position state the computation ended in
+            pd.testing.assert_frame_equal(cached.signals, first.signals)
+            self.assertEqual(cached.total_signals, first.total_signals)
+            self.assertEqual((strategy.previous_signal, strategy.position_open, strategy.entry_price),
+                             (computed.previous_signal, computed.position_open, computed.entry_price))
+            
+            # Different parameters never share an entry
+            TradingStrategy(profit_threshold=0.03).generate_signals(data)
+            self.assertEqual(calculate.call_count, 1)
+    
+    def test_position_sizes_match_scalar(self):
+        """Test that vectorized position sizes equal get_position_size element-wise, edge cases included."""
+        strategy = TradingStrategy()
+        rng = np.random.default_rng(11)
+        cash = np.concatenate([
+            [0.0, -100.0, 5000.0, 5000.0, 5000.0, 99.99, 100.0, 100.0, 0.3, 5000.0, 5000.0, np.nan],
+            rng.uniform(0, 20000, 500)
+        ])
+        prices = np.concatenate([
+            [150.0, 150.0, 0.0, -1.0, 100.0, 100.0, 100.0, 0.1, 0.1, 5000.01, 2.5, 150.0],
+            rng.uniform(0.01, 1000, 500)
+        ])
+        
+        for risk_per_trade in (0.02, 0.1, 1.0):
+            expected = [strategy.get_position_size(c, p, risk_per_trade) for c, p in zip(cash, prices)]
+            sizes = strategy.get_position_sizes(cash, prices, risk_per_trade)
+            
+            self.assertEqual(sizes.dtype, np.int64)
+            np.testing.assert_array_equal(sizes, expected, err_msg=f"risk_per_trade={risk_per_trade}")
+        
+        # Zero cash or a non-positive price never buys
+        self.assertTrue((strategy.get_position_sizes(cash[:4], prices[:4]) == 0).all())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+import unittest
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+import sys
+import os
+from unittest.mock import patch
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import core.strategy as strategy_module
+from core.strategy import TradingStrategy
+from core.strategy_kernels import replay_trades
+
+# Numba and bottleneck are optional. Without numba the kernels are plain Python behind the
+# stand-in njit, so the accelerated code paths are still exercised against the pandas ones.
+try:
+    import bottleneck
+except ImportError:
+    bottleneck = None
+
+class NumpyBottleneck:
+    """Stand-in for bottleneck's moving-window functions, used when it isn't installed."""
+    
+    @staticmethod
+    def _windows(a, window):
+        padded = np.concatenate([np.full(window - 1, np.nan), a])
+        return np.lib.stride_tricks.sliding_window_view(padded, window)
+    
+    @classmethod
+    def move_mean(cls, a, window, min_count=None):
+        windows = cls._windows(a, window)
+        counts = np.count_nonzero(~np.isnan(windows), axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = np.nansum(windows, axis=1) / counts
+        return np.where(counts >= (min_count or window), means, np.nan)
+    
+    @classmethod
+    def move_std(cls, a, window, min_count=None, ddof=0):
+        windows = cls._windows(a, window)
+        counts = np.count_nonzero(~np.isnan(windows), axis=1)
+        means = cls.move_mean(a, window, min_count=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            variance = np.nansum((windows - means[:, None]) ** 2, axis=1) / (counts - ddof)
+        return np.where(counts >= (min_count or window), np.sqrt(variance), np.nan)
+
+@contextmanager
+def accelerated(numba=False, bn=None):
+    """Run with the numba kernels and/or a bottleneck module, whatever is installed."""
+    with patch.object(strategy_module, 'NUMBA_AVAILABLE', numba), patch.object(strategy_module, 'bn', bn):
+        yield
+
+class TestAcceleratedPaths(unittest.TestCase):
+    """Test that the numba and bottleneck code paths match the pandas implementation."""
+    
+    PARAMETERS = [
+        dict(short_window=5, long_window=20, profit_threshold=0.015),
+        dict(short_window=3, long_window=10, profit_threshold=0.005, stop_loss=0.004, rsi_window=7),
+    ]
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        rng = np.random.default_rng(5)
+        closes = 100 + np.cumsum(rng.normal(0, 0.5, 300))
+        closes[[3, 50, 51, 52, 180]] = np.nan
+        self.data = pd.DataFrame({'Close': closes}, index=pd.date_range('2024-01-01', periods=300, freq='1min'))
+        
+        # Results are cached by prices and parameters only, so every run must compute afresh
+        strategy_module._signal_cache.clear()
+    
+    def tearDown(self):
+        """Leave no results computed on a patched path in the shared cache."""
+        strategy_module._signal_cache.clear()
+    
+    def indicators(self, parameters, **paths):
+        """Indicator columns computed on the given code path."""
+        with accelerated(**paths):
+            strategy = TradingStrategy(**parameters)
+            signals = strategy._create_signals_dataframe(self.data)
+            return strategy._calculate_indicators(signals)
+    
+    def run_signals(self, parameters, **paths):
+        """Signals of two consecutive chunks, and the position state they end in."""
+        with accelerated(**paths):
+            strategy = TradingStrategy(**parameters)
+            first = strategy.generate_signals(self.data.iloc[:200]).signals
+            second = strategy.generate_signals(self.data.iloc[200:]).signals
+            state = (strategy.previous_signal, strategy.position_open, strategy.entry_price)
+        strategy_module._signal_cache.clear()
+        return pd.concat([first, second]), state
+    
+    def test_moving_average_kernel_matches_pandas(self):
+        """Test that the moving-average kernel matches rolling means and crossovers."""
+        for parameters in self.PARAMETERS:
+            expected = self.indicators(parameters)
+            actual = self.indicators(parameters, numba=True)
+            
+            for column in ("short_ma", "long_ma"):
+                np.testing.assert_allclose(actual[column], expected[column], rtol=1e-9, err_msg=column)
+            np.testing.assert_array_equal(actual["crossover"], expected["crossover"])
+    
+    def test_rsi_kernel_matches_pandas(self):
+        """Test that rsi_ewm matches the pandas ewm RSI, across NaN prices."""
+        for parameters in self.PARAMETERS:
+            expected = self.indicators(parameters)["rsi"]
+            actual = self.indicators(parameters, numba=True)["rsi"]
+            
+            np.testing.assert_allclose(actual, expected, rtol=1e-9)
+    
+    def test_apply_signals_matches_python(self):
+        """Test that apply_signals gives the same signals and end state as the Python loop."""
+        for parameters in self.PARAMETERS:
+            expected, expected_state = self.run_signals(parameters)
+            actual, actual_state = self.run_signals(parameters, numba=True)
+            
+            self.assertTrue((expected["signal"] != 0).any())
+            np.testing.assert_array_equal(actual["signal"], expected["signal"])
+            self.assertEqual(actual_state, expected_state)
+    
+    def test_bottleneck_matches_pandas(self):
+        """Test that the bottleneck moving windows match pandas' rolling mean and std."""
+        for module in filter(None, (bottleneck, NumpyBottleneck)):
+            for parameters in self.PARAMETERS:
+                expected = self.indicators(parameters)
+                actual = self.indicators(parameters, bn=module)
+                
+                for column in ("short_ma", "long_ma", "volatility"):
+                    np.testing.assert_allclose(actual[column], expected[column], rtol=1e-9, err_msg=column)
+                np.testing.assert_array_equal(actual["crossover"], expected["crossover"])
+    
+    def test_replay_trades_matches_live_loop(self):
+        """Test that replay_trades trades like the live loop, bar by bar with get_position_size."""
+        signals, _ = self.run_signals(self.PARAMETERS[1])
+        signals = signals.dropna(subset=["price"])
+        prices = signals["price"].to_numpy(dtype=np.float64)
+        signal_values = signals["signal"].to_numpy(dtype=np.int64)
+        strategy = TradingStrategy()
+        
+        cash, shares_held = 1000.0, 0
+        trades, values = [], []
+        for i, (price, signal) in enumerate(zip(prices, signal_values)):
+            if signal == 1 and cash >= price:
+                shares = strategy.get_position_size(cash, price, risk_per_trade=0.02)
+                if shares > 0:
+                    cash -= shares * price
+                    shares_held += shares
+                    trades.append((i, 1, shares))
+            elif signal == -1 and shares_held > 0:
+                cash += shares_held * price
+                trades.append((i, -1, shares_held))
+                shares_held = 0
+            values.append(cash + shares_held * price)
+        
+        portfolio_values, indices, types, quantities, end_cash, end_shares = replay_trades(
+            prices, signal_values, 1000.0, 0.02
+        )
+        
+        self.assertTrue(trades)
+        self.assertEqual(list(zip(indices.tolist(), types.tolist(), quantities.tolist())), trades)
+        np.testing.assert_allclose(portfolio_values, values, rtol=1e-12)
+        self.assertAlmostEqual(end_cash, cash)
+        self.assertEqual(end_shares, shares_held)
+
+if __name__ == '__main__':
+    unittest.main()